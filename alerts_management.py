@@ -0,0 +1,137 @@
+# ALERTAS POR PICOS DE RECHAZO
+#
+# Línea base móvil (media y varianza exponenciales, ventana ~BASELINE['window']
+# días) de la venta perdida diaria por categoría de cada dimensión. Solo las
+# dimensiones con alguna categoría por encima del umbral se renderizan y envían.
+
+import os
+import json
+import numpy as np
+import pandas as pd
+import rollup_management as rm
+import metrics_management as metrics
+
+BASELINE = {
+    "window": 28,        # días de memoria de la media exponencial
+    "min_days": 7,       # días de historia antes de alertar
+    "threshold": 4.0,    # desviaciones estándar sobre la media
+    "min_std": 1.0,      # piso absoluto de la desviación (categorías casi constantes)
+    "min_std_ratio": 0.25,  # piso relativo: fracción de la media
+}
+
+# Dimensiones vigiladas (Cliente es demasiado disperso para una línea base diaria)
+ALERT_GROUPS = ["Motivo de anulación", "Código Transportista", "Ruta Troncal Dinámico"]
+
+def get_baseline_address(file, root_address, label='todas'):
+    stem = os.path.splitext(os.path.join(root_address, file['file_name']))[0]
+    return f'{stem}_alertas_{label}.json'
+
+def load_baselines(baseline_address):
+    try:
+        with open(baseline_address, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'last_day': None, 'dimensions': {}}
+
+def save_baselines(baseline_address, state):
+    tmp_address = baseline_address + '.tmp'
+    with open(tmp_address, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_address, baseline_address)
+
+# Sumas diarias día × categoría (días sin rechazos = 0) desde el rollup
+def _daily_matrix(rollup, document, group_by):
+    date = document['date']
+    data = rollup[group_by]
+    matrix = (
+        data.groupby([date, group_by], observed=True)[rm.INDICATOR]
+        .sum()
+        .unstack(group_by, fill_value=0)
+        .asfreq('D', fill_value=0)
+    )
+    matrix.columns = [str(c) for c in matrix.columns]
+    return matrix
+
+# Estado de una dimensión alineado a 'categories' (las nuevas empiezan vacías)
+def _baseline_arrays(dimension_state, categories):
+    known = dict(zip(dimension_state.get('categories', []), range(len(dimension_state.get('categories', [])))))
+    mean, var, n = np.zeros(len(categories)), np.zeros(len(categories)), np.zeros(len(categories), dtype=int)
+    for i, category in enumerate(categories):
+        j = known.get(category)
+        if j is not None:
+            mean[i], var[i], n[i] = dimension_state['mean'][j], dimension_state['var'][j], dimension_state['n'][j]
+    return mean, var, n
+
+# Actualizar media/varianza exponenciales con un día (todas las categorías a la vez)
+def _update(mean, var, n, values, alpha):
+    first = n == 0
+    diff = values - mean
+    mean = np.where(first, values, mean + alpha * diff)
+    var = np.where(first, 0.0, (1 - alpha) * (var + alpha * diff ** 2))
+    return mean, var, n + 1
+
+# Evalúa el último día del rollup (rollup_management) contra la línea base y la
+# actualiza con los días completos anteriores. El último día no se incorpora
+# todavía (el CSV puede estar a mitad del día): repetir la ejecución el mismo
+# día da el mismo resultado.
+# Devuelve {dimensión: [{categoría, valor, media, z}]} solo con las que superan el umbral.
+@metrics.instrument("check_alerts")
+def check_alerts(rollup, document, baseline_address, group_bys=None, **settings):
+    settings = dict(BASELINE, **settings)
+    alpha = 2 / (settings['window'] + 1)
+    group_bys = [g for g in (group_bys or ALERT_GROUPS) if g in document['group_by']]
+
+    state = load_baselines(baseline_address)
+    last_day = pd.Timestamp(state['last_day']) if state['last_day'] else None
+
+    alerts, newest = {}, None
+    for group_by in group_bys:
+        matrix = _daily_matrix(rollup, document, group_by)
+        if matrix.empty:
+            continue
+        newest = matrix.index[-1]
+        categories = list(matrix.columns)
+        mean, var, n = _baseline_arrays(state['dimensions'].get(group_by, {}), categories)
+
+        # Días completos aún no incorporados
+        pending = matrix.iloc[:-1]
+        if last_day is not None:
+            pending = pending[pending.index > last_day]
+        for values in pending.to_numpy(dtype=float):
+            mean, var, n = _update(mean, var, n, values, alpha)
+
+        state['dimensions'][group_by] = {
+            'categories': categories, 'mean': mean.tolist(), 'var': var.tolist(), 'n': n.tolist(),
+        }
+
+        # Puntaje del último día
+        today = matrix.iloc[-1].to_numpy(dtype=float)
+        std = np.maximum.reduce([np.sqrt(var), settings['min_std_ratio'] * mean, np.full(len(mean), settings['min_std'])])
+        z = (today - mean) / std
+        breach = (n >= settings['min_days']) & (z >= settings['threshold'])
+
+        if breach.any():
+            alerts[group_by] = sorted(
+                (
+                    {'categoria': categories[i], 'valor': round(today[i], 2),
+                     'media': round(mean[i], 2), 'z': round(z[i], 1)}
+                    for i in np.flatnonzero(breach)
+                ),
+                key=lambda alert: alert['z'], reverse=True,
+            )
+
+    if newest is not None:
+        state['last_day'] = str((newest - pd.Timedelta(days=1)).date())
+        save_baselines(baseline_address, state)
+
+    return alerts
+
+def print_alerts(alerts):
+    if not alerts:
+        print('[✓] Sin picos de rechazo: no se generan reportes.')
+        return
+    for group_by, items in alerts.items():
+        print(f'[!] {group_by}:')
+        for item in items:
+            print(f"    {item['categoria']:<30} {item['valor']:>10,.1f} CF  "
+                  f"(media {item['media']:,.1f}, z={item['z']})")
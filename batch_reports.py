@@ -0,0 +1,91 @@
+# REPORTES EN LOTE (varios periodos × locaciones en una sola ejecución)
+
+import os
+import re
+import glob
+import argparse
+
+import files_management as fm
+import rollup_management as rm
+import ruta_panel
+
+TIME_OPTIONS = {1: 'Año', 2: 'Mes', 3: 'Día', 4: 'Intervalo', 5: 'Desde'}
+
+# Nombre de carpeta de un job (p. ej. "Mes_10-2025_Pedregal")
+def job_label(job, locaciones, parse_locaciones):
+    if job['location_option'] == 1:
+        location = 'Todas'
+    else:
+        location = locaciones[job['location_option']-2]
+        location = parse_locaciones.get(location, location)
+    date = re.sub(r'[^0-9A-Za-z]+', '-', str(job['date'])).strip('-')
+    return f"{TIME_OPTIONS[job['time_option']]}_{date}_{location}"
+
+# Ejecutar todos los jobs sobre un único DataFrame ya procesado
+# job = {'time_option': 1-5, 'date': '...', 'location_option': 1-5}
+# rollup: el persistido (files_management.rollup_processing); con él df puede ser None
+# Devuelve {carpeta_del_job: [rutas png]}
+def run_batch(project_address, df, document, jobs, locaciones, parse_locaciones=None, rollup=None):
+    parse_locaciones = parse_locaciones or {}
+
+    # Una sola agrupación compartida por todos los jobs
+    if rollup is None:
+        rollup = rm.build_rollup(df, document)
+
+    results = {}
+    for job in jobs:
+        started_date, ended_date = fm.get_period_window(job['time_option'], job['date'])
+        locations = fm.get_location_list(job['location_option'], locaciones)
+        aggregates = rm.query_all(rollup, document, started_date, ended_date, locations)
+
+        output_address = os.path.join(project_address, job_label(job, locaciones, parse_locaciones))
+        os.makedirs(output_address, exist_ok=True)
+
+        # Evitar listar (y enviar) gráficos de una ejecución anterior
+        for old_file in glob.glob(os.path.join(output_address, '*.png')):
+            os.remove(old_file)
+
+        print(f"[*] Generando reportes: {os.path.basename(output_address)}")
+        paths = ruta_panel.main(output_address, df, document, job['date'], aggregates=aggregates)
+        results[output_address] = sorted(paths)
+
+    return results
+
+# "2:10/2025" -> (2, "10/2025")
+def _parse_period(value):
+    try:
+        time_option, date = value.split(':', 1)
+        return int(time_option), date
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Periodo inválido: {value!r} (usar OPCION:FECHA)")
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description="Reportes de rechazos en lote.")
+    parser.add_argument('--period', action='append', required=True, type=_parse_period,
+                        help="OPCION:FECHA, p. ej. 1:2025, 2:10/2025, 3:2025-10-17, '4:2025-1-1 2025-10-17', 5:2025-10-1")
+    parser.add_argument('--location', action='append', type=int, choices=range(1, 6),
+                        help="1: todas, 2-5: una locación (por defecto todas por separado)")
+    parser.add_argument('--root', default=config.root_address, help="Carpeta del CSV exportado")
+    parser.add_argument('--output', default=config.project_address, help="Carpeta de salida")
+    args = parser.parse_args()
+    for time_option, date in args.period:
+        try:
+            fm.get_period_window(time_option, date)
+        except (ValueError, OverflowError) as e:
+            parser.error(f"--period {time_option}:{date}: {e}")
+
+    locations = args.location or [2, 3, 4, 5]
+    jobs = [
+        {'time_option': time_option, 'date': date, 'location_option': location_option}
+        for time_option, date in args.period
+        for location_option in locations
+    ]
+
+    # Los jobs salen del rollup persistido: no hace falta cargar las filas crudas
+    rollup = fm.rollup_processing(config.ruta, config.locaciones, args.root)
+    run_batch(args.output, None, config.ruta, jobs, config.locaciones, config.parse_locaciones, rollup=rollup)
+
+if __name__ == '__main__':
+    main()
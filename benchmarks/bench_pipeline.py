@@ -0,0 +1,230 @@
+# BENCHMARK DEL PIPELINE: ingesta -> agregación -> render -> envío
+#
+#   python benchmarks/bench_pipeline.py                  # 10k y 1m filas
+#   python benchmarks/bench_pipeline.py --sizes 10k 1m 10m
+#
+# Genera CSVs sintéticos con el esquema de config.ruta['relevant_columns'],
+# mide cada etapa por separado (el envío usa un WebDriver de reemplazo) y
+# guarda los resultados en benchmarks/results/ para comparar entre versiones.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+
+BENCH_ADDRESS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_ADDRESS))
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+
+import config
+import files_management as fm
+import rollup_management as rm
+import ruta_panel
+
+RESULTS_ADDRESS = os.path.join(BENCH_ADDRESS, "results")
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# ==========================
+# DATOS SINTÉTICOS
+# ==========================
+
+def generate_csv(path, rows, chunk_rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2022-01-01", "2025-10-17").strftime("%Y-%m-%d").to_numpy()
+    locations = np.array(config.locaciones + ["12 AYA OTRA LOCACION"])
+    motivos = np.array([f"Motivo {i:02d}" for i in range(40)])
+    rutas = np.array([f"RT{i:02d}" for i in range(15)])
+    transportistas = np.array([f"{code}.0" for code in range(1000, 1010)])
+
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        cliente = rng.integers(100_000, 160_000, n)
+        codigo = rng.choice(transportistas, n)
+        chunk = pd.DataFrame({
+            "Locación": rng.choice(locations, n),
+            "Ruta Troncal Dinámico": rng.choice(rutas, n),
+            "Motivo de anulación": rng.choice(motivos, n),
+            "Día": np.sort(rng.choice(days, n)),
+            "Venta Perdida CF": np.round(rng.exponential(3.0, n) * (rng.random(n) > 0.2), 2),
+            "Cliente": cliente,
+            "Transportista": np.char.add("Transportista ", codigo),
+            "Nombre Vendedor": np.char.add("Vendedor ", (cliente % 50).astype(str)),
+            "Número de orden de carga": rng.integers(1, 500_000, n),
+            "Código Transportista": codigo,
+            "Columna no usada": rng.integers(0, 9, n),
+        })
+        chunk.to_csv(path, sep=";", index=False, header=written == 0, mode="w" if written == 0 else "a")
+        written += n
+
+# ==========================
+# ETAPAS
+# ==========================
+
+def timed(results, stage, func, *args, **kwargs):
+    started = time.perf_counter()
+    value = func(*args, **kwargs)
+    results[stage] = round(time.perf_counter() - started, 4)
+    print(f"    {stage:<24} {results[stage]:9.3f} s")
+    return value
+
+def bench_size(label, rows, work_address, send_latency):
+    document = config.ruta
+    root_address = os.path.join(work_address, label)
+    os.makedirs(root_address, exist_ok=True)
+    csv_path = os.path.join(root_address, document["file_name"])
+
+    if not os.path.exists(csv_path):
+        print(f"[*] Generando CSV sintético ({label}) ...")
+        generate_csv(csv_path, rows)
+
+    results = {"rows": rows, "csv_bytes": os.path.getsize(csv_path)}
+    print(f"[*] {label}: {rows:,} filas")
+
+    # --- Ingesta ---
+    df = timed(results, "ingest_csv", fm.file_processing, document, config.locaciones, root_address, use_cache=False)
+    for cached in glob_cache(root_address, document):
+        os.remove(cached)
+    timed(results, "ingest_cache_build", fm.file_processing, document, config.locaciones, root_address)
+    timed(results, "ingest_cache_warm", fm.file_processing, document, config.locaciones, root_address)
+    started_date, ended_date = fm.get_period_window(2, "9/2025")
+    timed(results, "ingest_stream_month", fm.stream_file_processing, document, config.locaciones,
+          root_address, started_date, ended_date)
+    df = timed(results, "parse_date", ruta_panel.parse_date, document, df)
+
+    # --- Agregación ---
+    def groupby_all():
+        return {g: ruta_panel._sum_by(df, g, "Venta Perdida CF") for g in document["group_by"]}
+
+    timed(results, "aggregate_groupby", groupby_all)
+    rollup = timed(results, "rollup_build", rm.build_rollup, df, document)
+    aggregates = timed(results, "rollup_query_month", rm.query_all, rollup, document, started_date, ended_date)
+
+    # --- Render (sin cache de render) ---
+    # Por entorno: ruta_panel.main recarga graphics y con ello RENDER_CACHE
+    output_address = os.path.join(root_address, "charts")
+    shutil.rmtree(output_address, ignore_errors=True)
+    os.makedirs(output_address)
+    os.environ["RENDER_CACHE"] = "0"
+    timed(results, "render", ruta_panel.main, output_address, df, document, "9/2025", aggregates=aggregates)
+
+    # --- Envío (WebDriver de reemplazo) ---
+    try:
+        import fake_whatsapp
+        import send_reports_through_wssp as srtw
+    except ImportError as e:
+        print(f"    send                     omitido ({e})")
+    else:
+        fake_whatsapp.install(latency=send_latency)
+        wssp = {"page_url": config.page_url, "group_names": ["Grupo A", "Grupo B"]}
+        timed(results, "send", srtw.main, output_address, wssp)
+        timed(results, "send_album", srtw.main, output_address, wssp, album=True)
+
+        # Cola persistente: 2 navegadores en paralelo, un fallo con reintento,
+        # y una segunda pasada que no debe reenviar nada
+        import send_queue_management as sqm
+        queue_address = sqm.get_queue_address(output_address)
+        if os.path.exists(queue_address):
+            os.remove(queue_address)
+        fake_whatsapp.install(latency=send_latency, fail_sends=1)
+        summary = timed(results, "send_queue", sqm.main, output_address, wssp, backoff=0.0)
+        jobs = sqm.load_queue(queue_address).values()
+        retried = [job for job in jobs if job["attempts"] == 1]
+        check("cola: sin jobs fallidos", not summary.get(sqm.FAILED))
+        check("cola: el job fallido se reintentó y quedó enviado",
+              len(retried) == 1 and retried[0]["status"] == sqm.SENT)
+        check("cola: todos los jobs enviados", all(job["status"] == sqm.SENT for job in jobs))
+
+        fake_whatsapp.install(latency=send_latency)
+        timed(results, "send_queue_repeat", sqm.main, output_address, wssp, backoff=0.0)
+        check("cola: la segunda pasada no reenvía nada", fake_whatsapp.sent_messages() == 0)
+
+    return results
+
+# Verificación de comportamiento (el benchmark falla si no se cumple)
+def check(description, condition):
+    if not condition:
+        raise AssertionError(f"❌ {description}")
+    print(f"    [✓] {description}")
+
+def glob_cache(root_address, document):
+    stem = os.path.splitext(os.path.join(root_address, document["file_name"]))[0]
+    return [path for path in (stem + ".parquet", stem + ".parquet.json") if os.path.exists(path)]
+
+# ==========================
+# RESULTADOS
+# ==========================
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BENCH_ADDRESS,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+def latest_results():
+    if not os.path.isdir(RESULTS_ADDRESS):
+        return None
+    files = sorted(f for f in os.listdir(RESULTS_ADDRESS) if f.endswith(".json"))
+    if not files:
+        return None
+    with open(os.path.join(RESULTS_ADDRESS, files[-1]), encoding="utf-8") as f:
+        return json.load(f)
+
+# Comparar contra la última corrida guardada (+% = más lento)
+def print_comparison(previous, current):
+    print(f"\n[*] Comparación con {previous['version']} ({previous['timestamp']}):")
+    for label, stages in current["results"].items():
+        before = previous["results"].get(label, {})
+        for stage, seconds in stages.items():
+            if stage in ("rows", "csv_bytes") or not before.get(stage):
+                continue
+            delta = 100 * (seconds - before[stage]) / before[stage]
+            flag = "  ⚠" if delta > 10 else ""
+            print(f"    {label:<4} {stage:<24} {before[stage]:9.3f} -> {seconds:9.3f} s ({delta:+.0f}%){flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de rechazos.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k", "1m"])
+    parser.add_argument("--work", default=os.path.join(tempfile.gettempdir(), "bench_rechazos"),
+                        help="Carpeta para CSVs sintéticos (se reutilizan entre corridas)")
+    parser.add_argument("--send-latency", type=float, default=0.0,
+                        help="Segundos simulados por acción del WebDriver")
+    parser.add_argument("--no-save", action="store_true", help="No guardar resultados")
+    args = parser.parse_args()
+
+    current = {
+        "version": git_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": {
+            label: bench_size(label, SIZES[label], args.work, args.send_latency)
+            for label in args.sizes
+        },
+    }
+
+    previous = latest_results()
+    if previous:
+        print_comparison(previous, current)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_ADDRESS, exist_ok=True)
+        name = f"{current['timestamp'].replace(':', '')}_{current['version']}.json"
+        with open(os.path.join(RESULTS_ADDRESS, name), "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"\n[✓] Resultados guardados en {os.path.join(RESULTS_ADDRESS, name)}")
+
+if __name__ == "__main__":
+    main()
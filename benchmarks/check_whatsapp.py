@@ -0,0 +1,156 @@
+# VERIFICACIONES DEL ENVÍO POR WHATSAPP (sin navegador ni CSV)
+#
+#   python benchmarks/check_whatsapp.py
+#
+# - Selectores: los XPath de send_reports_through_wssp contra un DOM mínimo
+#   de WhatsApp Web (whatsapp_fixture.html), con el editor de medios cerrado
+#   y abierto y con el último mensaje pendiente o enviado. Usa lxml; si no
+#   está instalado se omiten.
+# - Cola de envíos: reintento de un job fallido, segunda pasada sin reenvíos
+#   y job interrumpido con el gráfico re-renderizado, con el WebDriver de
+#   reemplazo (fake_whatsapp).
+
+import os
+import sys
+import shutil
+import tempfile
+
+BENCH_ADDRESS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_ADDRESS))
+
+import fake_whatsapp
+import send_reports_through_wssp as srtw
+import send_queue_management as sqm
+
+try:
+    from lxml import html
+except ImportError:
+    html = None
+
+FIXTURE_ADDRESS = os.path.join(BENCH_ADDRESS, "whatsapp_fixture.html")
+GRAPHICS = ["donut_Código Transportista_Venta Perdida CF.png", "pareto_Motivo de anulación_Venta Perdida CF.png"]
+WSSP = {"page_url": "https://web.whatsapp.com", "group_names": ["Grupo A", "Grupo B"]}
+
+def check(description, condition):
+    if not condition:
+        raise AssertionError(f"❌ {description}")
+    print(f"    [✓] {description}")
+
+# ==========================
+# SELECTORES
+# ==========================
+
+# DOM del fixture: editor de medios abierto o cerrado, ícono del último mensaje
+def load_fixture(editor_open, last_icon):
+    tree = html.parse(FIXTURE_ADDRESS)
+    if not editor_open:
+        for node in tree.xpath("//*[@data-fixture='editor']"):
+            node.getparent().remove(node)
+    for node in tree.xpath("//*[@data-fixture='last-status']"):
+        node.set("data-icon", last_icon)
+    return tree
+
+# data-fixture de los nodos que encuentra el XPath (en orden del documento)
+def matches(tree, xpath):
+    return [node.get("data-fixture") for node in tree.xpath(xpath)]
+
+def check_selectors():
+    if html is None:
+        print("[!] lxml no instalado: se omiten los selectores")
+        return
+    print("[*] Selectores (whatsapp_fixture.html)")
+
+    closed = load_fixture(editor_open=False, last_icon="msg-time")
+    check("SEARCH_BOX: solo el buscador, no el cuadro del chat", matches(closed, srtw.SEARCH_BOX) == ["search"])
+    check("ATTACH_BUTTON", matches(closed, srtw.ATTACH_BUTTON) == ["attach"])
+    check("IMAGE_INPUT", matches(closed, srtw.IMAGE_INPUT) == ["image-input"])
+    check("DOCUMENT_INPUT", matches(closed, srtw.DOCUMENT_INPUT) == ["document-input"])
+
+    # Con el editor cerrado nada de #main (imágenes blob:, cuadro de mensaje,
+    # botón "Enviar" del chat) debe cumplir las esperas del editor
+    for name in ("MEDIA_EDITOR", "MEDIA_PREVIEW", "MEDIA_THUMBNAIL", "CAPTION_BOX", "SEND_BUTTON"):
+        check(f"{name}: editor cerrado -> sin coincidencias en #main", matches(closed, getattr(srtw, name)) == [])
+
+    check("MESSAGE_OUT: solo mensajes propios", len(closed.xpath(srtw.MESSAGE_OUT)) == 3)
+    check("MESSAGE_SENT: último mensaje pendiente -> no cuenta el check de los anteriores",
+          matches(closed, srtw.MESSAGE_SENT) == [])
+
+    opened = load_fixture(editor_open=True, last_icon="msg-check")
+    check("MEDIA_EDITOR: solo la capa del editor", matches(opened, srtw.MEDIA_EDITOR) == ["editor"])
+    check("MEDIA_PREVIEW: vista previa primero, todo dentro del editor",
+          matches(opened, srtw.MEDIA_PREVIEW) == ["preview", "thumbnail-img", "thumbnail-img"])
+    check("MEDIA_THUMBNAIL: miniaturas con imagen (no el botón de agregar)",
+          matches(opened, srtw.MEDIA_THUMBNAIL) == ["thumbnail", "thumbnail"])
+    check("CAPTION_BOX: el pie del editor, no el buscador ni el chat", matches(opened, srtw.CAPTION_BOX) == ["caption"])
+    check("SEND_BUTTON: el del editor, no el del chat", matches(opened, srtw.SEND_BUTTON) == ["editor-send"])
+
+    for icon in ("msg-check", "msg-dblcheck", "msg-dblcheck-ack"):
+        tree = load_fixture(editor_open=True, last_icon=icon)
+        check(f"MESSAGE_SENT: último mensaje con {icon}", matches(tree, srtw.MESSAGE_SENT) == ["last-status"])
+
+# ==========================
+# COLA DE ENVÍOS
+# ==========================
+
+def write_graphic(project_address, name, content):
+    with open(os.path.join(project_address, name), "wb") as f:
+        f.write(content)
+
+def uploaded_files():
+    return [path for driver in fake_whatsapp.DRIVERS for path in driver.uploaded]
+
+def check_queue():
+    print("[*] Cola de envíos (fake_whatsapp)")
+    project_address = tempfile.mkdtemp(prefix="cola_envios_")
+    try:
+        for name in GRAPHICS:
+            write_graphic(project_address, name, name.encode("utf-8"))
+        queue_address = sqm.get_queue_address(project_address)
+        jobs_address = sqm.get_jobs_address(queue_address)
+
+        # Un fallo en "Enviar": el job se reintenta y todo queda enviado
+        fake_whatsapp.install(fail_sends=1)
+        summary = sqm.main(project_address, WSSP, backoff=0.0)
+        jobs = sqm.load_queue(queue_address).values()
+        retried = [job for job in jobs if job["attempts"] == 1]
+        check("cola: sin jobs fallidos", not summary.get(sqm.FAILED))
+        check("cola: el job fallido se reintentó y quedó enviado",
+              len(retried) == 1 and retried[0]["status"] == sqm.SENT)
+        check("cola: todos los jobs enviados", len(jobs) == 4 and all(job["status"] == sqm.SENT for job in jobs))
+        check("cola: sin copias de jobs enviados", os.listdir(jobs_address) == [])
+
+        # Mismos gráficos otra vez: nada que reenviar
+        fake_whatsapp.install()
+        sqm.main(project_address, WSSP, backoff=0.0)
+        check("cola: la segunda pasada no reenvía nada", fake_whatsapp.sent_messages() == 0)
+
+        # Job cortado en 'enviando' (reinicio) y el gráfico se vuelve a generar
+        # con otro contenido antes de procesar la cola
+        name = GRAPHICS[0]
+        write_graphic(project_address, name, b"version 1")
+        sqm.enqueue(queue_address, project_address, ["Grupo A"])
+        jobs = sqm.load_queue(queue_address)
+        interrupted = [job for job in jobs.values() if job["status"] == sqm.PENDING]
+        for job in interrupted:
+            sqm._set_status(job, sqm.SENDING)
+        sqm.save_queue(queue_address, jobs)
+
+        write_graphic(project_address, name, b"version 2")
+        rerendered = sqm.job_id("Grupo A", [os.path.join(project_address, name)])
+        fake_whatsapp.install()
+        summary = sqm.main(project_address, {**WSSP, "group_names": ["Grupo A"]}, backoff=0.0)
+        expected = [os.path.join(jobs_address, key, name) for key in (interrupted[0]["id"], rerendered)]
+        check("cola: un solo job interrumpido", len(interrupted) == 1)
+        check("cola: el job interrumpido y el re-render se envían una vez cada uno",
+              fake_whatsapp.sent_messages() == 2 and sorted(uploaded_files()) == sorted(expected))
+        check("cola: sin jobs fallidos tras el re-render", not summary.get(sqm.FAILED))
+    finally:
+        shutil.rmtree(project_address, ignore_errors=True)
+
+def main():
+    check_selectors()
+    check_queue()
+    print("\n[✓] Verificaciones de envío completas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# WEBDRIVER DE REEMPLAZO PARA WHATSAPP WEB
+#
+# Imita lo mínimo del DOM que usa send_reports_through_wssp (buscador, clip,
+# inputs de archivo, miniaturas, botón de enviar y burbujas con check) para
+# medir o ejercitar el envío sin navegador ni red. 'latency' simula el
+# tiempo de respuesta de cada acción; 'fail_sends' hace fallar los primeros
+# N clics en "Enviar" (reintentos de la cola de envíos) y sent_messages()
+# cuenta los mensajes enviados.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import send_reports_through_wssp as srtw
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+
+# Fallos pendientes, compartidos por todos los drivers
+FAILURES = {"sends": 0}
+
+# Drivers creados desde el último install() (para contar mensajes enviados)
+DRIVERS = []
+
+
+class FakeElement:
+    def __init__(self, driver, xpath):
+        self.driver = driver
+        self.xpath = xpath
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.driver._act()
+        if self.xpath == srtw.SEND_BUTTON:
+            if FAILURES["sends"] > 0:
+                FAILURES["sends"] -= 1
+                raise WebDriverException("envío fallido (simulado)")
+            self.driver.sent_messages += 1
+            self.driver.pending_files = 0
+
+    def send_keys(self, *values):
+        self.driver._act()
+        if self.xpath in (srtw.IMAGE_INPUT, srtw.DOCUMENT_INPUT):
+            paths = "".join(str(v) for v in values).split("\n")
+            self.driver.pending_files = len(paths)
+            self.driver.uploaded.extend(paths)
+
+
+class FakeDriver:
+    def __init__(self, options=None, latency=0.0, fail_on=None):
+        self.latency = latency
+        self.fail_on = fail_on          # xpath que nunca aparece (simular timeouts)
+        self.current_url = "about:blank"
+        self.sent_messages = 0
+        self.pending_files = 0
+        self.uploaded = []
+
+    def _act(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get(self, url):
+        self._act()
+        self.current_url = url
+
+    def find_element(self, by, xpath):
+        if self.fail_on and self.fail_on in xpath:
+            raise NoSuchElementException(xpath)
+        return FakeElement(self, xpath)
+
+    def find_elements(self, by, xpath):
+        if xpath == srtw.MESSAGE_OUT:
+            count = self.sent_messages
+        elif xpath == srtw.MEDIA_THUMBNAIL:
+            count = self.pending_files
+        else:
+            count = 1
+        return [FakeElement(self, xpath) for _ in range(count)]
+
+    def quit(self):
+        self.current_url = None
+
+
+# Mensajes enviados por todos los drivers desde el último install()
+def sent_messages():
+    return sum(driver.sent_messages for driver in DRIVERS)
+
+# Reemplazar webdriver.Chrome dentro del módulo de envío
+def install(latency=0.0, fail_on=None, fail_sends=0):
+    FAILURES["sends"] = fail_sends
+    DRIVERS.clear()
+
+    def chrome(options=None):
+        driver = FakeDriver(options, latency, fail_on)
+        DRIVERS.append(driver)
+        return driver
+
+    srtw.webdriver.Chrome = chrome
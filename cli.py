@@ -0,0 +1,277 @@
+# PUNTO DE ENTRADA POR LÍNEA DE COMANDOS (sin notebook ni input())
+#
+#   python cli.py --period 2:10/2025 --location 2 --send prueba
+#   python cli.py --period 3:2025-10-17 --groups "Motivo de anulación" Cliente
+#
+# Los módulos pesados (pandas, matplotlib, selenium, rich) se importan solo
+# dentro de la etapa que los usa.
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+import config
+
+# "2:10/2025" -> (2, "10/2025")
+def parse_period(value):
+    try:
+        time_option, date = value.split(':', 1)
+        return int(time_option), date
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Periodo inválido: {value!r} (usar OPCION:FECHA)")
+
+def build_parser(description="Reporte de rechazos por WhatsApp.", period_required=True):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--period', required=period_required, type=parse_period,
+                        help="OPCION:FECHA -> 1:2025, 2:10/2025, 3:2025-10-17, '4:2025-1-1 2025-10-17', 5:2025-10-1 (desde)")
+    parser.add_argument('--location', type=int, default=1, choices=range(1, 6),
+                        help="1: todas, 2-5: " + ", ".join(config.locaciones))
+    parser.add_argument('--groups', nargs='+', choices=config.ruta['group_by'],
+                        default=config.ruta['group_by'], help="Reportes a generar")
+    parser.add_argument('--send', choices=sorted(config.wssp_groups),
+                        help="Grupo de WhatsApp destino (sin esta opción no se envía)")
+    parser.add_argument('--album', action='store_true',
+                        help="Enviar todos los gráficos en un solo mensaje (álbum)")
+    parser.add_argument('--queue', action='store_true',
+                        help="Enviar mediante la cola persistente (reintentos, sin reenvíos, grupos en paralelo)")
+    parser.add_argument('--contexts', type=int, default=2,
+                        help="Navegadores en paralelo con --queue (un perfil de Chrome por navegador)")
+    parser.add_argument('--keep-alive', action='store_true',
+                        help="Dejar WhatsApp Web abierto para el siguiente envío del mismo proceso")
+    parser.add_argument('--profile', choices=['whatsapp', 'png_paleta', 'webp'],
+                        help="Enviar variantes optimizadas (los originales se conservan)")
+    parser.add_argument('--root', default=config.root_address, help="Carpeta del CSV exportado")
+    parser.add_argument('--output', default=config.project_address, help="Carpeta de los gráficos")
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], default='csv',
+                        help="csv: leer el CSV (cache parquet); sqlite: consultar el almacén SQLite local")
+    parser.add_argument('--stream', action='store_true',
+                        help="Con --backend csv: leer el CSV por bloques conservando solo el periodo y las locaciones")
+    parser.add_argument('--parallel', action='store_true', help="Renderizar gráficos en paralelo")
+    parser.add_argument('--output-mode', choices=['charts', 'dashboard', 'pdf', 'tendencias'], default='charts',
+                        help="Un PNG por reporte, un dashboard compuesto, un PDF de varias páginas "
+                             "o tendencias diarias (líneas y mapa de calor)")
+    parser.add_argument('--compare', choices=['anterior', 'año_anterior'],
+                        help="Reportes de comparación contra el periodo anterior o el del año pasado")
+    parser.add_argument('--alerts', action='store_true',
+                        help="Solo generar/enviar las dimensiones con picos sobre su línea base diaria")
+    parser.add_argument('--show', action='store_true', help="Mostrar resumen del DataFrame")
+    parser.add_argument('--trace', help="Traza JSON de tiempos/memoria por etapa "
+                                            "(por defecto <output>/traza_ejecucion.json)")
+    return parser
+
+# ==========================
+# ETAPAS
+# ==========================
+
+# Ventana del periodo y, con --compare, la del periodo de comparación
+def period_windows(args):
+    import files_management as fm
+
+    time_option, date = args.period
+    current = fm.get_period_window(time_option, date)
+    previous = fm.get_comparison_window(*current, args.compare) if args.compare else None
+    return current, previous
+
+# Validar --period (y su combinación con --compare) antes de cargar datos
+def check_period(parser, args):
+    if args.period is None:
+        return
+    try:
+        (started_date, ended_date), _ = period_windows(args)
+    except (ValueError, OverflowError) as e:
+        # Primera línea del error de pandas + formato esperado de la opción
+        import files_management as fm
+        period = fm.PERIODS.get(args.period[0])
+        expected = " -> " + fm.PERIOD_PROMPTS[period].strip(' >:\n') if period else ""
+        parser.error(f"--period {args.period[0]}:{args.period[1]}: {str(e).splitlines()[0].split('. You might')[0]}{expected}")
+    if ended_date is not None and started_date > ended_date:
+        parser.error(f"--period {args.period[0]}:{args.period[1]}: la fecha de inicio es posterior a la de fin")
+
+# Rango de fechas a cargar (con --compare cubre ambas ventanas) y locaciones
+def load_window(args):
+    import files_management as fm
+
+    (started_date, ended_date), previous = period_windows(args)
+    if previous is not None:
+        started_date = min(started_date, previous[0])
+    return started_date, ended_date, fm.get_location_list(args.location, config.locaciones)
+
+def load_stage(args, document):
+    import files_management as fm
+
+    if args.backend != 'sqlite':
+        if args.stream:
+            started_date, ended_date, locations = load_window(args)
+            df = fm.stream_file_processing(document, locations, args.root, started_date, ended_date)
+        else:
+            df = fm.file_processing(document, config.locaciones, args.root)
+        return filter_stage(args, document, df)
+
+    import sqlite_management as sm
+    started_date, ended_date, locations = load_window(args)
+
+    db_address = sm.sync_db(document, config.locaciones, args.root)
+    df = sm.query_rows(db_address, document, started_date, ended_date, locations)
+    return show_stage(args, df)
+
+# Corte por periodo/locación de un DataFrame ya cargado (p. ej. en memoria)
+def filter_stage(args, document, df):
+    import files_management as fm
+
+    started_date, ended_date, locations = load_window(args)
+
+    df = fm.select_dates(df, document, started_date, ended_date)
+    df = df[df['Locación'].isin(locations)]
+    return show_stage(args, df)
+
+def show_stage(args, df):
+    if args.show:
+        import print_management as pm
+        pm.show_df(df)
+    return df
+
+def render_stage(args, document, df):
+    import matplotlib
+    matplotlib.use('Agg')
+    import ruta_panel
+
+    # Evitar enviar gráficos de una ejecución anterior
+    for pattern in ('*.png', '*.pdf'):
+        for old_file in glob.glob(os.path.join(args.output, pattern)):
+            os.remove(old_file)
+
+    if args.compare:
+        import files_management as fm
+        current, previous = period_windows(args)
+        labels = (args.period[1], fm.format_window(*previous))
+
+        # Rollup persistido del CSV (con sqlite se agrupan las filas consultadas)
+        rollup, locations = None, None
+        if args.backend != 'sqlite':
+            rollup = fm.rollup_processing(document, config.locaciones, args.root)
+            locations = fm.get_location_list(args.location, config.locaciones)
+        paths = ruta_panel.main_comparison(args.output, df, document, current, previous, labels,
+                                           rollup=rollup, locations=locations)
+        if not paths:
+            print("[!] Sin datos para el periodo/locación seleccionados.")
+        return bool(paths)
+
+    if args.output_mode == 'tendencias':
+        return bool(ruta_panel.main_trends(args.output, df, document, args.period[1]))
+
+    aggregates = None
+    if args.backend == 'sqlite':
+        aggregates = sql_aggregates(args, document)
+
+    _, date = args.period
+    if args.output_mode != 'charts':
+        mode = 'png' if args.output_mode == 'dashboard' else 'pdf'
+        return ruta_panel.main_dashboard(args.output, df, document, date, mode=mode, aggregates=aggregates) is not None
+
+    if args.parallel:
+        _, errors = ruta_panel.main_parallel(args.output, df, document, date, aggregates=aggregates)
+        return not errors
+
+    ruta_panel.main(args.output, df, document, date, aggregates=aggregates)
+    return True
+
+# Sumas por dimensión resueltas en SQLite (sin agrupar las filas en pandas)
+def sql_aggregates(args, document):
+    import files_management as fm
+    import sqlite_management as sm
+
+    time_option, date = args.period
+    started_date, ended_date = fm.get_period_window(time_option, date)
+    locations = fm.get_location_list(args.location, config.locaciones)
+
+    db_address = sm.get_db_address(document, args.root)
+    return sm.query_all(db_address, document, started_date, ended_date, locations)
+
+# Dimensiones con picos de rechazo en el último día (rollup persistido de la locación)
+def alert_stage(args, document):
+    import files_management as fm
+    import rollup_management as rm
+    import alerts_management as am
+
+    locations = fm.get_location_list(args.location, config.locaciones)
+    rollup = fm.rollup_processing(document, config.locaciones, args.root)
+    rollup = rm.select_locations(rollup, locations)
+
+    label = 'todas' if args.location == 1 else config.parse_locaciones.get(locations[0], locations[0])
+    alerts = am.check_alerts(rollup, document, am.get_baseline_address(document, args.root, label))
+    am.print_alerts(alerts)
+
+    return [group_by for group_by in document['group_by'] if group_by in alerts]
+
+def send_stage(args):
+    import send_reports_through_wssp as srtw
+
+    send_address = args.output
+    if args.profile:
+        import image_management as im
+        send_address = im.optimize_graphics(args.output, args.profile)
+
+    wssp_config = {
+        'page_url': config.page_url,
+        'group_names': config.wssp_groups[args.send],
+    }
+    if args.queue:
+        import send_queue_management as sqm
+        summary = sqm.main(send_address, wssp_config, album=args.album, max_contexts=args.contexts)
+        return not summary.get(sqm.FAILED)
+
+    return srtw.main(send_address, wssp_config, keep_alive=args.keep_alive, album=args.album)
+
+# Ruta de la traza JSON de la ejecución
+def trace_path(args):
+    import metrics_management as metrics
+    return args.trace or os.path.join(args.output, metrics.TRACE_FILE)
+
+def run_pipeline(args, document):
+    started = time.perf_counter()
+    if args.alerts:
+        group_by = alert_stage(args, document)
+        if not group_by:
+            return 0
+        document = dict(document, group_by=group_by)
+
+    if args.compare and args.backend != 'sqlite':
+        # La comparación sale del rollup persistido: no se cargan las filas
+        df = None
+    else:
+        df = load_stage(args, document)
+        print(f"[✓] Datos cargados: {len(df)} filas ({time.perf_counter() - started:.1f} s)")
+
+        if df.empty:
+            print("[!] Sin datos para el periodo/locación seleccionados.")
+            return 1
+
+    ok = render_stage(args, document, df)
+    print(f"[✓] Gráficos generados en {args.output} ({time.perf_counter() - started:.1f} s)")
+
+    if args.send:
+        ok = send_stage(args) and ok
+
+    return 0 if ok else 1
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.stream and args.backend == 'sqlite':
+        parser.error("--stream solo aplica a --backend csv.")
+    check_period(parser, args)
+    document = dict(config.ruta, group_by=args.groups)
+
+    import metrics_management as metrics
+    metrics.reset_run()
+
+    # Resumen y traza en toda ejecución, también si termina antes o con error
+    try:
+        return run_pipeline(args, document)
+    finally:
+        metrics.run_report(trace_path(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
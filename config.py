@@ -0,0 +1,63 @@
+import os
+
+# Diccionarios
+parse_locaciones = {
+    '06 AYA EL PEDREGAL': 'Pedregal',
+    '38 AYA ATICO': 'Atico',
+    '40 AYA CHALA': 'Chala',
+    '88 AYA CAMANA': 'Camana'
+}
+months = {
+    1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
+    7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre',
+    11: 'Noviembre', 12: 'Diciembre'
+}
+ruta = {
+    "name": "ruta",
+    "file_name": "Cf_rech_por_ruta.csv",                    # Nombre del archivo local
+    "date": "Día",
+    "transportista": "Código Transportista",
+    "relevant_columns": [
+        'Locación',
+        'Ruta Troncal Dinámico',
+        'Motivo de anulación',
+        'Día',
+        'Venta Perdida CF',
+        'Cliente',
+        'Transportista',
+        'Nombre Vendedor',
+        'Número de orden de carga',
+        'Código Transportista'
+    ],
+    "group_by": [ # sobre 'Venta Perdida CF'
+        'Motivo de anulación',
+        'Código Transportista',
+        'Ruta Troncal Dinámico',
+        'Cliente',
+    ],
+    "schema": { # tipos aplicados al leer (files_management.apply_schema)
+        'Locación': 'category',
+        'Ruta Troncal Dinámico': 'category',
+        'Motivo de anulación': 'category',
+        'Día': 'datetime',
+        'Venta Perdida CF': 'float32',
+        'Cliente': 'category',
+        'Transportista': 'category',
+        'Nombre Vendedor': 'category',
+        'Código Transportista': 'category',
+    }
+}
+
+# Listas
+locaciones = ['06 AYA EL PEDREGAL', '38 AYA ATICO', '40 AYA CHALA', '88 AYA CAMANA']
+
+# Constantes
+root_address = r'C:\Informacion\rechazos'
+project_address = os.path.dirname(os.path.abspath(__file__))
+
+# Envío por WhatsApp
+page_url = 'https://web.whatsapp.com'
+wssp_groups = {
+    'oficial': ['PEDREGAL - DISTRIBUCIÓN'],
+    'prueba': ['GrupoPrueba - ón'],
+}
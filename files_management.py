@@ -1,5 +1,13 @@
 import os
+import io
+import glob
+import json
+import shutil
+import hashlib
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+import rollup_management as rm
+import metrics_management as metrics
 
 # Eliminar todas las columnas excepto las relevantes
 def get_relevant_columns(df, file):
@@ -11,19 +19,133 @@ def get_relevant_locations(df, locaciones):
 
 # Ajustar valores
 def adjust_values(df):
-    df = df.fillna(0)
+    # Las fechas ya tipadas conservan sus nulos
+    fill_columns = [col for col in df.columns if not is_datetime64_any_dtype(df[col])]
+    df = df.fillna({col: 0 for col in fill_columns if not isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+    # Categorías: el 0 se agrega como categoría (mismo tipo que las existentes)
+    for col in fill_columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].isna().any():
+            zero = 0 if pd.api.types.is_numeric_dtype(df[col].cat.categories) else '0'
+            if zero not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([zero])
+            df[col] = df[col].fillna(zero)
 
     try:
         return df[df['Venta Perdida CF'] != 0]
     except:
         return df
     
-# Preparar archivo para analizar
-def file_processing(file, locaciones, root_address):
-    df = pd.read_csv(os.path.join(root_address, file['file_name']), sep=';')
-    #print(df.info())
+# ==========================
+# ESQUEMA DE TIPOS
+# ==========================
+# file['schema'] = {columna: 'category' | 'float32' | 'datetime' | ...}
+# Sin esquema declarado solo la locación se vuelve categórica.
+DEFAULT_SCHEMA = {'Locación': 'category'}
+
+def get_schema(file):
+    return file.get('schema', DEFAULT_SCHEMA)
+
+# dtypes aplicables directamente en pd.read_csv (las fechas se parsean aparte)
+# categories=False: las categóricas se leen como texto (mismos valores que con
+# 'category') y se categorizan después con apply_schema
+def read_dtypes(file, categories=True):
+    return {
+        col: dtype if categories or dtype != 'category' else 'str'
+        for col, dtype in get_schema(file).items()
+        if dtype != 'datetime'
+    }
+
+def apply_schema(df, file):
+    for col, dtype in get_schema(file).items():
+        if col in df.columns and dtype != 'datetime' and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+# Tipar columnas: fecha parseada + esquema declarado
+def set_column_types(df, file):
+    df = get_relevant_columns(df, file).copy()
+    df[file['date']] = pd.to_datetime(df[file['date']], format='%Y-%m-%d', errors='coerce')
+    return apply_schema(df, file)
+
+# Leer solo las columnas relevantes del CSV (tipos aplicados al leer)
+def read_relevant_csv(path, file, **kwargs):
+    df = pd.read_csv(path, sep=';', usecols=file['relevant_columns'], dtype=read_dtypes(file), **kwargs)
+    return set_column_types(df, file)
+
+# Hash del contenido del archivo (lectura por bloques)
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_cache_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache_meta(meta_path, meta):
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
 
-    df = get_relevant_columns(df, file)
+# Cargar el CSV desde una cache columnar (parquet)
+# Se reconstruye solo si cambia el mtime, el tamaño o el hash del CSV
+def load_cached_file(file, root_address):
+    csv_path = os.path.join(root_address, file['file_name'])
+    cache_path = os.path.splitext(csv_path)[0] + '.parquet'
+    meta_path = cache_path + '.json'
+
+    stat = os.stat(csv_path)
+    meta = _read_cache_meta(meta_path)
+
+    same_layout = (
+        meta is not None
+        and meta.get('columns') == file['relevant_columns']
+        and meta.get('schema') == get_schema(file)
+    )
+
+    if same_layout and os.path.exists(cache_path):
+        if meta['mtime'] == stat.st_mtime and meta['size'] == stat.st_size:
+            return pd.read_parquet(cache_path)
+
+        # Archivo "tocado" pero con el mismo contenido
+        if meta['size'] == stat.st_size and meta['hash'] == file_hash(csv_path):
+            meta['mtime'] = stat.st_mtime
+            _write_cache_meta(meta_path, meta)
+            return pd.read_parquet(cache_path)
+
+    df = read_relevant_csv(csv_path, file)
+
+    tmp_path = cache_path + '.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+
+    _write_cache_meta(meta_path, {
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'hash': file_hash(csv_path),
+        'columns': file['relevant_columns'],
+        'schema': get_schema(file),
+    })
+
+    return df
+
+# Preparar archivo para analizar
+@metrics.instrument("file_processing")
+def file_processing(file, locaciones, root_address, use_cache=True):
+    if use_cache:
+        try:
+            df = load_cached_file(file, root_address)
+        except ImportError:
+            # Sin motor parquet (pyarrow/fastparquet) -> lectura directa
+            print('[!] Cache parquet no disponible, leyendo CSV completo.')
+            df = read_relevant_csv(os.path.join(root_address, file['file_name']), file)
+    else:
+        df = read_relevant_csv(os.path.join(root_address, file['file_name']), file)
     #print(df.info())
 
     df = get_relevant_locations(df, locaciones)
@@ -34,34 +156,445 @@ def file_processing(file, locaciones, root_address):
 
     return df
 
+# ==========================
+# LECTURA POR BLOQUES (STREAMING)
+# ==========================
+# Los filtros de locación, venta perdida != 0 y rango de fechas se aplican a
+# cada bloque: la memoria pico depende del resultado filtrado, no del CSV.
+
+def _filter_chunk(chunk, file, locaciones, started_date, ended_date):
+    chunk = get_relevant_locations(chunk, locaciones)
+    chunk = chunk[chunk['Venta Perdida CF'].fillna(0) != 0]
+
+    chunk = chunk.copy()
+    chunk[file['date']] = pd.to_datetime(chunk[file['date']], format='%Y-%m-%d', errors='coerce')
+    if started_date is not None:
+        chunk = chunk[chunk[file['date']] >= started_date]
+    if ended_date is not None:
+        chunk = chunk[chunk[file['date']] <= ended_date]
+
+    return chunk
+
+# Preparar archivo para analizar (lectura por bloques, fechas inclusivas)
+@metrics.instrument("stream_file_processing")
+def stream_file_processing(file, locaciones, root_address, started_date=None, ended_date=None, chunksize=200_000):
+    reader = pd.read_csv(
+        os.path.join(root_address, file['file_name']), sep=';',
+        usecols=file['relevant_columns'], dtype=read_dtypes(file, categories=False),
+        chunksize=chunksize
+    )
+
+    frames = [
+        _filter_chunk(chunk, file, locaciones, started_date, ended_date)
+        for chunk in reader
+    ]
+    df = apply_schema(get_relevant_columns(pd.concat(frames, ignore_index=True), file), file)
+    df['Locación'] = pd.Categorical(df['Locación'], categories=locaciones)
+
+    return adjust_values(df)
+
+# ==========================
+# ==========================
+# INGESTA INCREMENTAL
+# ==========================
+# El CSV crece agregando filas al final: se guarda el offset (bytes) ya
+# procesado y solo se parsean las filas nuevas. Las filas se persisten en
+# un store de parquet con un archivo por mes (<store>/Día=yyyy-mm.parquet):
+# una ingesta reescribe solo los meses que recibieron filas y la lectura es
+# un único escaneo de pocos archivos, sin importar los días de historia.
+
+FINGERPRINT_BYTES = 1 << 16
+STORE_LAYOUT = 'mensual'
+STORE_HISTORY = 50      # ingestas recordadas en _state.json (ver load_store_since)
+NO_DATE = 'sin_fecha'
+
+def get_store_address(file, root_address):
+    return os.path.splitext(os.path.join(root_address, file['file_name']))[0] + '_store'
+
+# Hash de los últimos bytes ya procesados (detecta si el CSV fue reescrito)
+def _offset_fingerprint(path, offset):
+    start = max(0, offset - FINGERPRINT_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+# utf-8-sig: los CSV exportados desde Excel/Windows empiezan con BOM
+def _read_csv_header(path):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.readline().rstrip('\r\n').split(';')
+
+# Leer solo las filas completas agregadas despues de 'offset'
+def _read_appended_rows(path, file, offset, header):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+
+    # Ignorar una ultima linea incompleta (archivo aun escribiéndose)
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset
+
+    df = pd.read_csv(
+        io.BytesIO(data[:end]), sep=';', header=None, names=header,
+        usecols=file['relevant_columns'], dtype=read_dtypes(file)
+    )
+    return set_column_types(df, file), offset + end
+
+def _month_path(file, store_address, month):
+    return os.path.join(store_address, f"{file['date']}={month}.parquet")
+
+# Agregar las filas a su archivo mensual (solo se reescriben los meses que
+# reciben filas; archivos temporales + reemplazo al final)
+# Devuelve {mes: filas del archivo} de los meses escritos
+def _write_months(df, file, store_address):
+    months = df[file['date']].dt.strftime('%Y-%m').fillna(NO_DATE)
+
+    written, counts = [], {}
+    for month, rows in df.groupby(months, sort=False):
+        path = _month_path(file, store_address, month)
+        if os.path.exists(path):
+            rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+        rows = apply_schema(rows.reset_index(drop=True), file)
+        rows.to_parquet(path + '.tmp', index=False)
+        written.append(path)
+        counts[month] = len(rows)
+
+    for path in written:
+        os.replace(path + '.tmp', path)
+
+    return counts
+
+# Filas por archivo mensual (store creado antes de guardar el historial)
+def _store_counts(file, store_address):
+    prefix = f"{file['date']}="
+    return {
+        os.path.basename(path)[len(prefix):-len('.parquet')]: len(pd.read_parquet(path, columns=[file['date']]))
+        for path in glob.glob(os.path.join(store_address, prefix + '*.parquet'))
+    }
+
+# Estado del store (offset ingerido, huella, encabezado); None si no existe
+def read_store_state(file, root_address):
+    return _read_cache_meta(os.path.join(get_store_address(file, root_address), '_state.json'))
+
+# Actualizar el store con las filas nuevas del CSV
+# Devuelve (filas, appended): con appended=True 'filas' son solo las agregadas
+# al final del CSV (None si no hubo); con appended=False el store se
+# reconstruyó y 'filas' es el CSV completo.
+# Con 'locaciones' también se pone al día el rollup persistido.
+def update_store(file, root_address, locaciones=None):
+    csv_path = os.path.join(root_address, file['file_name'])
+    store_address = get_store_address(file, root_address)
+    state_path = os.path.join(store_address, '_state.json')
+
+    size = os.path.getsize(csv_path)
+    header = _read_csv_header(csv_path)
+    state = _read_cache_meta(state_path)
+
+    is_append = (
+        state is not None
+        and state.get('layout') == STORE_LAYOUT
+        and state.get('header') == header
+        and state.get('columns') == file['relevant_columns']
+        and state.get('schema') == get_schema(file)
+        and state['offset'] <= size
+        and state['fingerprint'] == _offset_fingerprint(csv_path, state['offset'])
+    )
+
+    if is_append:
+        df, offset = None, state['offset']
+        if offset < size:
+            df, offset = _read_appended_rows(csv_path, file, offset, header)
+    else:
+        # Primera carga, CSV reescrito o store de otra versión -> reconstruir
+        shutil.rmtree(store_address, ignore_errors=True)
+        os.makedirs(store_address)
+        df = read_relevant_csv(csv_path, file)
+        offset = size
+
+    if df is not None:
+        # Historial de ingestas: filas por mes en cada offset, para que otros
+        # derivados (p. ej. el almacén SQLite) se pongan al día con solo lo nuevo
+        if is_append:
+            history = state.get('ingests') or [{
+                'offset': state['offset'],
+                'fingerprint': state['fingerprint'],
+                'counts': _store_counts(file, store_address),
+            }]
+            counts = history[-1]['counts']
+        else:
+            history, counts = [], {}
+        counts = {**counts, **_write_months(df, file, store_address)}
+        fingerprint = _offset_fingerprint(csv_path, offset)
+        history = (history + [{'offset': offset, 'fingerprint': fingerprint, 'counts': counts}])[-STORE_HISTORY:]
+
+        _write_cache_meta(state_path, {
+            'layout': STORE_LAYOUT,
+            'offset': offset,
+            'fingerprint': fingerprint,
+            'header': header,
+            'columns': file['relevant_columns'],
+            'schema': get_schema(file),
+            'ingests': history,
+        })
+
+    if locaciones is not None:
+        previous_offset = state['offset'] if is_append else None
+        _update_rollup(file, locaciones, root_address, df, previous_offset, offset)
+
+    return df, is_append
+
+# Sumar al rollup persistido las filas recién ingeridas. Se reconstruye desde
+# el store si no existe, quedó atrasado (offset distinto al previo a esta
+# ingesta), cambiaron las locaciones/esquema o le falta alguna dimensión.
+def _update_rollup(file, locaciones, root_address, rows, previous_offset, offset):
+    rollup_address = rm.get_rollup_address(file, root_address)
+    meta = rm.read_rollup_meta(rollup_address) or {}
+
+    same_layout = (
+        meta.get('locaciones') == list(locaciones)
+        and meta.get('schema') == get_schema(file)
+        and set(file['group_by']) <= set(meta.get('group_by', []))
+    )
+    if same_layout and meta.get('offset') == offset:
+        return
+    document = dict(file, group_by=list(dict.fromkeys(meta.get('group_by', []) + file['group_by'])))
+
+    if same_layout and previous_offset is not None and meta.get('offset') == previous_offset:
+        new_rollup = rm.build_rollup(adjust_values(get_relevant_locations(rows, locaciones)), document)
+        rollup = rm.merge_rollup(rm.load_rollup(rollup_address, document), new_rollup, document)
+    else:
+        data = rows if previous_offset is None else load_store(file, root_address)
+        rollup = rm.build_rollup(adjust_values(get_relevant_locations(data, locaciones)), document)
+
+    rm.save_rollup(rollup, rollup_address, {
+        'offset': offset,
+        'locaciones': list(locaciones),
+        'schema': get_schema(file),
+    })
+
+# Leer el store (opcionalmente solo el rango de fechas, inclusivo)
+# Los meses fuera del rango no se abren; el resto se lee en un solo escaneo
+def load_store(file, root_address, started_date=None, ended_date=None):
+    store_address = get_store_address(file, root_address)
+    prefix = f"{file['date']}="
+
+    paths = []
+    for path in sorted(glob.glob(os.path.join(store_address, prefix + '*.parquet'))):
+        month = os.path.basename(path)[len(prefix):-len('.parquet')]
+        if started_date is not None or ended_date is not None:
+            if month == NO_DATE:
+                continue
+            month = pd.Period(month, freq='M')
+            if (started_date is not None and month.end_time < started_date) or (ended_date is not None and month.start_time > ended_date):
+                continue
+        paths.append(path)
+
+    if not paths:
+        return pd.DataFrame(columns=file['relevant_columns'])
+
+    try:
+        df = pd.read_parquet(paths)
+    except (ValueError, TypeError, NotImplementedError):
+        # Meses con tipos distintos (p. ej. una categoría sin valores) -> uno por uno
+        df = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+    date = df[file['date']]
+    if started_date is not None:
+        df = df[date >= started_date]
+    if ended_date is not None:
+        df = df[date <= ended_date]
+
+    # Categorías distintas entre meses -> volver a aplicar el esquema
+    return apply_schema(df.reset_index(drop=True), file)
+
+# Filas ingeridas al store después de una ingesta previa (su offset y huella
+# en _state.json). None si ya no está en el historial: hay que reconstruir.
+def load_store_since(file, root_address, offset, fingerprint):
+    store_address = get_store_address(file, root_address)
+    history = (read_store_state(file, root_address) or {}).get('ingests') or []
+
+    before = next((entry['counts'] for entry in history
+                   if entry['offset'] == offset and entry['fingerprint'] == fingerprint), None)
+    if before is None:
+        return None
+
+    # Cada mes guarda sus filas en orden de llegada: lo nuevo va al final
+    parts = [
+        pd.read_parquet(_month_path(file, store_address, month)).iloc[before.get(month, 0):]
+        for month, count in history[-1]['counts'].items()
+        if count > before.get(month, 0)
+    ]
+    if not parts:
+        return pd.DataFrame(columns=file['relevant_columns'])
+
+    return apply_schema(pd.concat(parts, ignore_index=True), file)
+
+# Preparar archivo para analizar (modo incremental)
+@metrics.instrument("incremental_processing")
+def incremental_processing(file, locaciones, root_address):
+    df, appended = update_store(file, root_address, locaciones)
+    if appended:
+        df = load_store(file, root_address)
+
+    df = get_relevant_locations(df, locaciones)
+    df = adjust_values(df)
+
+    return df
+
+# Rollup de venta perdida al día con el CSV (sin cargar las filas crudas
+# salvo en la primera construcción)
+@metrics.instrument("rollup_processing")
+def rollup_processing(file, locaciones, root_address):
+    update_store(file, root_address, locaciones)
+    return rm.load_rollup(rm.get_rollup_address(file, root_address), file)
+
+# Actualizar en memoria un DataFrame de incremental_processing (proceso que
+# queda abierto): si el CSV solo creció se agregan únicamente las filas nuevas;
+# si fue reescrito (o df es None) se usa el store completo
+@metrics.instrument("refresh_processing")
+def refresh_processing(df, file, locaciones, root_address):
+    rows, appended = update_store(file, root_address, locaciones)
+
+    if not appended:
+        full = rows
+    elif df is None:
+        full = load_store(file, root_address)
+    elif rows is None:
+        return df
+    else:
+        rows = adjust_values(get_relevant_locations(rows, locaciones))
+        return apply_schema(pd.concat([df.reset_index(drop=True), rows], ignore_index=True), file)
+
+    return adjust_values(get_relevant_locations(full, locaciones))
+
+# Periodos de análisis (mismas opciones que el menú del notebook)
+PERIODS = {1: 'year', 2: 'month', 3: 'day', 4: 'interval', 5: 'since'}
+PERIOD_PROMPTS = {
+    'year': "\n>> Año (yyyy): ",
+    'month': "\n>> Mes/Año (m/yyyy): ",
+    'day': "\n>> Año-Mes-Dia (yyyy-m-d): ",
+    'interval': "\n>> (yyyy-m-d yyyy-m-d): ",
+    'since': "\n>> Desde Año-Mes-Dia (yyyy-m-d): ",
+}
+
+# Ordenar por fecha una sola vez (después de ruta_panel.parse_date)
+# El índice queda como DatetimeIndex ordenado; las filas sin fecha se descartan
+# porque ningún periodo las selecciona
+def index_by_date(df, file):
+    if _is_date_indexed(df):
+        return df
+    dates = df[file['date']]
+    df = df[dates.notna()].sort_values(file['date'], kind='stable')
+    df.index = pd.DatetimeIndex(df[file['date']]).rename(None)
+    return df
+
+def _is_date_indexed(df):
+    return isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing
+
+# Rango de fechas (inclusivo) de un periodo; ended_date None = hasta el último registro
+# year: yyyy, month: m/yyyy, day: yyyy-m-d, interval: yyyy-m-d yyyy-m-d, since: yyyy-m-d
+def get_period_bounds(period, value):
+    value = str(value).strip()
+    if period == 'year':
+        started_date = pd.Timestamp(year=int(value), month=1, day=1)
+        ended_date = pd.Timestamp(year=int(value), month=12, day=31)
+    elif period == 'month':
+        month, year = value.split('/')
+        started_date = pd.Timestamp(year=int(year), month=int(month), day=1)
+        ended_date = started_date + pd.offsets.MonthEnd(0)
+    elif period == 'day':
+        started_date = ended_date = pd.to_datetime(value, format='%Y-%m-%d')
+    elif period == 'interval':
+        started_date, ended_date = value.split()
+        started_date = pd.to_datetime(started_date, format='%Y-%m-%d')
+        ended_date = pd.to_datetime(ended_date, format='%Y-%m-%d')
+    elif period == 'since':
+        started_date, ended_date = pd.to_datetime(value, format='%Y-%m-%d'), None
+    else:
+        raise ValueError(f"Periodo inválido: {period}")
+
+    return started_date, ended_date
+
+# Corte por rango de fechas (inclusivo) con búsqueda binaria sobre el índice ordenado
+def select_dates(df, file, started_date=None, ended_date=None):
+    df = index_by_date(df, file)
+    start = 0 if started_date is None else df.index.searchsorted(started_date, side='left')
+    end = len(df) if ended_date is None else df.index.searchsorted(ended_date, side='right')
+    return df.iloc[start:end]
+
+# Corte por periodo: select_period(df, ruta, 'month', '10/2025')
+def select_period(df, file, period, value):
+    return select_dates(df, file, *get_period_bounds(period, value))
+
 # Filtrar por tiempo
+@metrics.instrument("get_specific_date")
 def get_specific_date(df, file, time_option):
-    if time_option == 1:
-        date = input("\n>> Año (yyyy): ")
-        started_date = pd.to_datetime(str(date)+'-01-01', format='%Y-%m-%d')
-        ended_date = pd.to_datetime(str(date)+'-12/31/', format='%Y-%m-%d')
-        df = df[(df[file['date']] >= started_date) & (df[file['date']] <= ended_date)]
-    elif time_option == 2:
-        date = input("\n>> Mes/Año (m/yyyy): ")
-        month, year = date.split('/')
-        started_date = pd.to_datetime(str(year)+'-'+str(month)+'-01', format='%Y-%m-%d')
-        ended_date = pd.to_datetime(str(year)+'-'+str(int(month)+1)+'-01', format='%Y-%m-%d')
-        df = df[(df[file['date']] >= started_date) & (df[file['date']] < ended_date)]
-    elif time_option == 3:
-        date = input("\n>> Año-Mes-Dia (yyyy-m-d): ")
-        fecha_corte = pd.to_datetime(str(date), format='%Y-%m-%d')
-        df = df[df[file['date']] == fecha_corte]
-    elif time_option == 4:
-        date = input("\n>> (yyyy-m-d yyyy-m-d): ")
-        started_date, ended_date = date.split(' ')
-        started_date = pd.to_datetime(str(started_date), format='%Y-%m-%d')
-        ended_date = pd.to_datetime(str(ended_date), format='%Y-%m-%d')
-        df = df[(df[file['date']] >= started_date) & (df['Día'] <= ended_date)]
-    elif time_option == 5:
+    if time_option not in PERIODS:
         exit()
 
+    period = PERIODS[time_option]
+    date = input(PERIOD_PROMPTS[period])
+    df = select_period(df, file, period, date)
+
     return df, date
 
+# Rango de fechas (inclusivo) de una opción de tiempo, sin input()
+# Mismos formatos que get_specific_date (1: yyyy, 2: m/yyyy, 3: yyyy-m-d, 4: yyyy-m-d yyyy-m-d, 5: yyyy-m-d)
+def get_period_window(time_option, date):
+    if time_option not in PERIODS:
+        raise ValueError(f"Opción de tiempo inválida: {time_option}")
+    return get_period_bounds(PERIODS[time_option], date)
+
+# Ventana de comparación para un rango de fechas (inclusivo)
+# 'anterior': periodo inmediatamente anterior (mes(es) calendario completos o
+#             misma cantidad de días); 'año_anterior': mismo periodo del año pasado
+#             (semanas completas -> 52 semanas antes, para comparar los mismos días de la semana)
+COMPARISONS = ('anterior', 'año_anterior')
+
+def _is_whole_months(started_date, ended_date):
+    return started_date.day == 1 and ended_date == ended_date + pd.offsets.MonthEnd(0)
+
+def get_comparison_window(started_date, ended_date, compare='anterior'):
+    if ended_date is None:
+        raise ValueError("La comparación necesita un periodo con fecha de fin.")
+    days = (ended_date - started_date).days + 1
+    whole_months = _is_whole_months(started_date, ended_date)
+
+    if compare == 'anterior':
+        if whole_months:
+            months = (ended_date.year - started_date.year) * 12 + ended_date.month - started_date.month + 1
+            return started_date - pd.DateOffset(months=months), started_date - pd.Timedelta(days=1)
+        return started_date - pd.Timedelta(days=days), started_date - pd.Timedelta(days=1)
+
+    if compare == 'año_anterior':
+        if days % 7 == 0 and not whole_months:
+            shift = pd.Timedelta(weeks=52)
+            return started_date - shift, ended_date - shift
+        started_date, ended_date = started_date - pd.DateOffset(years=1), ended_date - pd.DateOffset(years=1)
+        if whole_months:
+            ended_date = ended_date + pd.offsets.MonthEnd(0)   # febrero bisiesto
+        return started_date, ended_date
+
+    raise ValueError(f"Comparación inválida: {compare}")
+
+# Etiqueta corta de un rango de fechas ("9/2025", "2025-9-17", "2025-9-1 a 2025-9-7")
+def format_window(started_date, ended_date):
+    if started_date == ended_date:
+        return f"{started_date.year}-{started_date.month}-{started_date.day}"
+    if _is_whole_months(started_date, ended_date) and started_date.year == ended_date.year:
+        if started_date.month == ended_date.month:
+            return f"{started_date.month}/{started_date.year}"
+        if (started_date.month, ended_date.month) == (1, 12):
+            return str(started_date.year)
+    return (f"{started_date.year}-{started_date.month}-{started_date.day} a "
+            f"{ended_date.year}-{ended_date.month}-{ended_date.day}")
+
+# Locaciones de una opción de locación (1: todas, 2-5: una)
+def get_location_list(location_option, locaciones):
+    if location_option == 1:
+        return list(locaciones)
+    return [locaciones[location_option-2]]
+
 # Filtrar por locacion
 def get_specific_location(df, location_option, locaciones):
     if location_option == 1:
@@ -1,20 +1,35 @@
 import os
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import functools
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
+import metrics_management as metrics
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
 
 # Utilidad: asegurar Serie agregada (acepta DataFrame o Serie)
 def _ensure_series(data, group_by, indicator, ascending=False):
     """
-    Si 'data' es Serie, la devuelve ordenada.
+    Si 'data' es Serie, la devuelve ordenada (o respeta su orden si
+    data.attrs["ordenada"]).
     Si es DataFrame, agrupa por 'group_by' y suma 'indicator'.
     """
-    if isinstance(data, pd.Series):
+    if isinstance(data, pd.Series) and data.attrs.get("ordenada"):
+        # Orden ya definido (p. ej. Top N + "Otros" al final): solo se invierte
+        s = data.astype(float)
+        s = s.iloc[::-1] if ascending else s
+    elif isinstance(data, pd.Series):
         s = data.astype(float).sort_values(ascending=ascending)
     elif isinstance(data, pd.DataFrame):
         s = (
-            data.groupby(group_by)[indicator]
+            data.groupby(group_by, observed=True)[indicator]
             .sum()
             .sort_values(ascending=ascending)
             .astype(float)
@@ -35,9 +50,235 @@ STYLE = {
     "secondary": {"fontsize": 11, "color": "#666", "fontweight": "normal"},
 }
 
+# ==============================
+# CACHE DE RENDER (por contenido)
+# ==============================
+# Clave = hash(tipo de gráfico, Serie agregada, fecha, parámetros, STYLE).
+# Si la clave existe se copia el PNG guardado en vez de volver a dibujar.
+# RENDER_CACHE=0 en el entorno la desactiva (sobrevive a importlib.reload).
+RENDER_CACHE = {
+    "enabled": os.environ.get("RENDER_CACHE", "1") != "0",
+    # Compartida por todas las carpetas de salida (reportes en lote)
+    "folder": os.path.join(os.path.dirname(os.path.abspath(__file__)), ".render_cache"),
+    "max_bytes": 200 * 1024 * 1024,     # tamaño máximo de la cache
+    "max_age_days": 30,                 # antigüedad máxima de cada entrada
+}
+
+def _render_key(prefix, data, params):
+    if isinstance(data, pd.DataFrame) and data.attrs.get("pivot"):
+        # Pivot fecha × serie (gráficos de tendencia)
+        s = data
+        labels = [list(map(str, data.columns)), list(map(str, data.index))]
+    else:
+        s = _ensure_series(data, params["group_by"], params["indicator"], ascending=False)
+        labels = list(map(str, s.index))
+
+    digest = hashlib.sha256()
+    digest.update(prefix.encode())
+    digest.update(matplotlib.__version__.encode())
+    digest.update(pd.util.hash_pandas_object(s, index=True).values.tobytes())
+    digest.update(json.dumps([labels, params, STYLE], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+# Borrar una entrada que otro proceso (render en paralelo) pudo haber borrado
+# o estar copiando (en Windows un archivo abierto no se puede borrar)
+def _remove_entry(path):
+    try:
+        os.remove(path)
+    except (FileNotFoundError, PermissionError):
+        pass
+
+# Eliminar entradas viejas y luego las menos usadas hasta respetar el tamaño
+# Los .tmp son escrituras en curso de otros procesos: no se tocan
+def _evict_render_cache(cache_address):
+    now = time.time()
+    max_age = RENDER_CACHE["max_age_days"] * 86400
+
+    entries = []
+    for name in os.listdir(cache_address):
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(cache_address, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime > max_age:
+            _remove_entry(path)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= RENDER_CACHE["max_bytes"]:
+            break
+        _remove_entry(path)
+        total -= size
+
+def _render_cache(prefix):
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not RENDER_CACHE["enabled"]:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            project_address = params.pop("project_address")
+            params.pop("strict", None)
+            data = params.pop("data") if "data" in params else params.pop("df")
+
+            try:
+                key = _render_key(prefix, data, params)
+            except Exception:
+                # Datos inválidos: el gráfico reporta el error
+                return func(*args, **kwargs)
+
+            cache_address = RENDER_CACHE["folder"]
+            cached = os.path.join(cache_address, f"{key}.png")
+            target = os.path.join(project_address, f'{prefix}_{params["group_by"]}_{params["indicator"]}.png')
+
+            # La entrada puede desaparecer entre la consulta y la copia
+            # (desalojo de otro proceso): en ese caso se dibuja
+            try:
+                shutil.copyfile(cached, target)
+                os.utime(cached)
+                return target
+            except FileNotFoundError:
+                pass
+
+            path = func(*args, **kwargs)
+            if path:
+                # Guardar en la cache es opcional: un fallo no invalida el gráfico
+                try:
+                    os.makedirs(cache_address, exist_ok=True)
+                    tmp = f"{cached}.{os.getpid()}.tmp"
+                    shutil.copyfile(path, tmp)
+                    os.replace(tmp, cached)
+                    _evict_render_cache(cache_address)
+                except OSError as e:
+                    print(f"[!] Cache de render no actualizada: {e}")
+            return path
+
+        return wrapper
+    return decorator
+
+# ==============================
+# PLANTILLAS DE FIGURA (reutilización)
+# ==============================
+# El esqueleto de cada gráfico (figura, ejes, estilo, spines, artistas) se
+# construye una vez por forma (tipo, cantidad de categorías, tamaño, colores)
+# y en cada llamada solo se actualizan los datos: alturas de barras, línea,
+# textos y etiquetas. Las figuras no pasan por pyplot (no se acumulan).
+TEMPLATES = {
+    "enabled": True,
+    "max_templates": 32,
+}
+# Sobrevive a importlib.reload() del módulo (ruta_panel lo recarga en cada llamada)
+_TEMPLATES = globals().get('_TEMPLATES', {})
+
+# Si el reload trae cambios en este archivo, los esqueletos ya construidos
+# pueden tener el código de dibujo anterior -> descartarlos
+_SOURCE_MTIME = os.path.getmtime(__file__)
+if globals().get('_TEMPLATES_SOURCE') != _SOURCE_MTIME:
+    _TEMPLATES.clear()
+_TEMPLATES_SOURCE = _SOURCE_MTIME
+
+def _template(key, build):
+    if not TEMPLATES["enabled"]:
+        return build()
+
+    # STYLE en la clave: un estilo editado (en el archivo o en memoria) no
+    # reutiliza fuentes ni colores del anterior
+    key = (json.dumps(STYLE, sort_keys=True), key)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        if len(_TEMPLATES) >= TEMPLATES["max_templates"]:
+            _TEMPLATES.pop(next(iter(_TEMPLATES)))
+        template = _TEMPLATES[key] = build()
+    return template
+
+def _new_figure(width, height, facecolor="white"):
+    fig = Figure(figsize=(width, height), facecolor=facecolor)
+    return fig, fig.add_subplot()
+
+def _save_template(template, project_address, filename):
+    path = os.path.join(project_address, filename)
+    template["fig"].savefig(path, dpi=300, bbox_inches="tight")
+    return path
+
 # ==============================
 # GRÁFICO PARETO (barras + %)
 # ==============================
+def _pareto_artists(ax, n, bar_color="#E41A1C", line_color="#1C1C1C"):
+    x = np.arange(n)
+
+    # --- Barras ---
+    bars = ax.bar(x, np.zeros(n), color=bar_color, alpha=0.85)
+    bar_labels = [
+        ax.annotate("", xy=(i, 0), xytext=(0, 4), textcoords="offset points",
+                    ha="center", va="bottom", **STYLE["labels"])
+        for i in x
+    ]
+
+    # --- Línea de Pareto ---
+    ax2 = ax.twinx()
+    line, = ax2.plot(x, np.zeros(n), marker="o", markersize=7,
+                     color=line_color, linewidth=1)
+    ax2.set_ylim(5, 150)
+
+    key_labels = [
+        ax2.annotate("", xy=(0, 0), xytext=(0, 6), textcoords="offset points",
+                     ha="center", va="bottom",
+                     fontsize=STYLE["labels"]["fontsize"]+3,
+                     color=line_color, fontweight="normal")
+        for _ in range(3)
+    ]
+
+    # --- Quitar ejes Y ---
+    ax.yaxis.set_visible(False)
+    ax2.yaxis.set_visible(False)
+    for spine in list(ax.spines.values()) + list(ax2.spines.values()):
+        spine.set_visible(False)
+
+    # --- Eje X ---
+    ax.set_xticks(x)
+
+    # --- Grid discreto ---
+    ax.grid(axis="y", linestyle="--", linewidth=0.6, alpha=0.25, color="#aaa")
+
+    return {"ax": ax, "bars": bars, "bar_labels": bar_labels, "line": line, "key_labels": key_labels}
+
+def _pareto_update(artists, s):
+    ax = artists["ax"]
+    total = float(s.sum())
+    cumperc = 100 * s.cumsum() / total
+
+    for i, (bar, label, h) in enumerate(zip(artists["bars"], artists["bar_labels"], s.values)):
+        bar.set_height(h)
+        label.xy = (i, h)
+        label.set_text(f"{h:,.0f} CF" if h > 0 else "")
+    ax.relim()
+    ax.autoscale_view()
+
+    artists["line"].set_ydata(cumperc.values)
+
+    key_points = [0, np.argmax(cumperc >= 85), len(cumperc)-1]
+    for label, i in zip(artists["key_labels"], key_points):
+        val = cumperc.iloc[i]
+        label.xy = (i, val)
+        label.set_text(f"{val:.1f}%")
+
+    ax.set_xticklabels(s.index, rotation=30, ha="right", **STYLE["ticks"])
+
+def _draw_pareto(ax, s, bar_color="#E41A1C", line_color="#1C1C1C"):
+    _pareto_update(_pareto_artists(ax, len(s), bar_color, line_color), s)
+
+@metrics.instrument("pareto_graphic")
+@_render_cache("pareto")
 def pareto_graphic(
         project_address,
         data,
@@ -47,73 +288,110 @@ def pareto_graphic(
         width=11,
         height=6,
         bar_color="#E41A1C",
-        line_color="#1C1C1C"
+        line_color="#1C1C1C",
+        strict=False
     ):
     try:
         s = _ensure_series(data, group_by, indicator, ascending=False)
         if s.empty:
             raise ValueError("Serie de datos vacía para pareto_graphic().")
 
-        total = float(s.sum())
-        cumperc = 100 * s.cumsum() / total
-        x = np.arange(len(s))
-
-        fig, ax = plt.subplots(figsize=(width, height), facecolor="white")
-
-        # --- Barras ---
-        bars = ax.bar(x, s.values, color=bar_color, alpha=0.85)
-        for bar in bars:
-            h = bar.get_height()
-            if h > 0:
-                ax.annotate(f"{h:,.0f} CF",
-                            xy=(bar.get_x() + bar.get_width()/2, h),
-                            xytext=(0, 4), textcoords="offset points",
-                            ha="center", va="bottom",
-                            **STYLE["labels"])
-
-        # --- Línea de Pareto ---
-        ax2 = ax.twinx()
-        ax2.plot(x, cumperc.values, marker="o", markersize=7,
-                 color=line_color, linewidth=1)
-        ax2.set_ylim(5, 150)
-
-        key_points = [0, np.argmax(cumperc >= 85), len(cumperc)-1]
-        for i in key_points:
-            val = cumperc.iloc[i]
-            ax2.annotate(f"{val:.1f}%",
-                         xy=(x[i], val),
-                         xytext=(0, 6), textcoords="offset points",
-                         ha="center", va="bottom",
-                         fontsize=STYLE["labels"]["fontsize"]+3,
-                         color=line_color, fontweight="normal")
-
-        # --- Quitar ejes Y ---
-        ax.yaxis.set_visible(False)
-        ax2.yaxis.set_visible(False)
-        for spine in list(ax.spines.values()) + list(ax2.spines.values()):
-            spine.set_visible(False)
-
-        # --- Eje X ---
-        ax.set_xticks(x)
-        ax.set_xticklabels(s.index, rotation=30, ha="right", **STYLE["ticks"])
-
-        # --- Grid discreto ---
-        ax.grid(axis="y", linestyle="--", linewidth=0.6, alpha=0.25, color="#aaa")
+        def build():
+            fig, ax = _new_figure(width, height)
+            template = _pareto_artists(ax, len(s), bar_color, line_color)
+            # --- Título ---
+            template["title"] = ax.set_title("", **STYLE["title"], pad=10)
+            fig.subplots_adjust(top=0.88, bottom=0.24, left=0.06, right=0.98)
+            template["fig"] = fig
+            return template
 
-        # --- Título ---
-        ax.set_title(f"{group_by} • {date}", **STYLE["title"], pad=10)
+        template = _template(("pareto", len(s), width, height, bar_color, line_color), build)
+        _pareto_update(template, s)
+        template["title"].set_text(f"{group_by} • {date}")
 
-        plt.subplots_adjust(top=0.88, bottom=0.24, left=0.06, right=0.98)
-        filename = f'pareto_{group_by}_{indicator}.png'
-        plt.savefig(os.path.join(project_address, filename), dpi=300, bbox_inches='tight')
-        plt.close(fig)
+        return _save_template(template, project_address, f'pareto_{group_by}_{indicator}.png')
     except Exception as e:
         print(f"❌ Error en pareto_graphic(): {e}")
+        if strict:
+            raise
 
 
 # ==============================
 # GRÁFICO DONUT (participación)
 # ==============================
+# Devuelve el texto resumen de las porciones pequeñas ("Otros") o None
+def _draw_donut(ax, s, indicator, colors):
+    total = float(s.sum())
+    labels = [str(i).split('.')[0][-4:] for i in s.index]
+    values = s.values
+
+    if not colors:
+        cmap = matplotlib.colormaps["tab20"]
+        colors = [cmap(i/len(values)) for i in range(len(values))]
+    elif len(colors) < len(values):
+        cmap = matplotlib.colormaps["tab20"]
+        extra = [cmap(i/len(values)) for i in range(len(values) - len(colors))]
+        colors = colors + extra
+
+    min_frac_for_inside = 0.05
+    main_labels, main_values, small_labels, small_values = [], [], [], []
+    for lbl, val in zip(labels, values):
+        if val / total >= min_frac_for_inside:
+            main_labels.append(lbl); main_values.append(val)
+        else:
+            small_labels.append(lbl); small_values.append(val)
+
+    summary_total = 0
+    summary_lines = []
+    if small_values:
+        summary_total = sum(small_values)
+        for l, v in zip(small_labels, small_values):
+            summary_lines.append(f"{l}: {v:,.0f} CF")
+        main_labels.append("Otros"); main_values.append(summary_total)
+
+    wedges, _ = ax.pie(main_values, labels=None, startangle=90,
+                       colors=colors[:len(main_values)],
+                       wedgeprops=dict(width=0.38, edgecolor="white", linewidth=1))
+    ax.set_aspect('equal')
+
+    # --- Etiquetas dentro/fuera ---
+    for i, wedge in enumerate(wedges):
+        ang = (wedge.theta2 + wedge.theta1) / 2
+        theta = np.deg2rad(ang)
+        r = 0.38 / 2 + 0.62
+        x, y = np.cos(theta) * r, np.sin(theta) * r
+
+        if main_labels[i] == "Otros":
+            ax.annotate("Otros", xy=(x, y),
+                        xytext=(1.15*np.cos(theta), 1.15*np.sin(theta)),
+                        ha="center", va="center",
+                        **STYLE["secondary"],
+                        arrowprops=dict(arrowstyle="-", lw=0.6, color="#bbb"))
+        else:
+            ax.text(x, y, f"{main_labels[i]}", ha="center", va="center", **STYLE["labels"])
+
+    # --- Valores afuera ---
+    for i, wedge in enumerate(wedges):
+        if main_labels[i] == "Otros": continue
+        ang = (wedge.theta2 + wedge.theta1) / 2
+        x, y = np.cos(np.deg2rad(ang)), np.sin(np.deg2rad(ang))
+        ax.annotate(f"{main_values[i]:,.0f} CF", xy=(x, y), xytext=(1.25*x, 1.25*y),
+                    ha="center", va="center", **STYLE["labels"],
+                    arrowprops=dict(arrowstyle="-", lw=0.6, color="#bbb"))
+
+    # --- Centro ---
+    ax.text(0, 0.05, f"{total:,.0f}", ha="center", va="center", **STYLE["totals"])
+    ax.text(0, -0.05, f"{indicator}", ha="center", va="center", **STYLE["secondary"])
+
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    if summary_lines:
+        return "Otros:\n" + "\n".join(summary_lines) + f"\nTotal {summary_total:,.0f} CF"
+    return None
+
+@metrics.instrument("donut_graphic")
+@_render_cache("donut")
 def donut_graphic(
         project_address,
         data,
@@ -123,99 +401,85 @@ def donut_graphic(
         colors,
         width=8,
         height=7,
+        strict=False
     ):
     try:
         s = _ensure_series(data, group_by, indicator, ascending=False)
         if s.empty:
             raise ValueError("Serie de datos vacía para donut_graphic().")
 
-        total = float(s.sum())
-        labels = [str(i).split('.')[0][-4:] for i in s.index]
-        values = s.values
-
-        if not colors:
-            cmap = plt.cm.get_cmap("tab20")
-            colors = [cmap(i/len(values)) for i in range(len(values))]
-        elif len(colors) < len(values):
-            cmap = plt.cm.get_cmap("tab20")
-            extra = [cmap(i/len(values)) for i in range(len(values) - len(colors))]
-            colors = colors + extra
-
-        min_frac_for_inside = 0.05
-        main_labels, main_values, small_labels, small_values = [], [], [], []
-        for lbl, val in zip(labels, values):
-            if val / total >= min_frac_for_inside:
-                main_labels.append(lbl); main_values.append(val)
-            else:
-                small_labels.append(lbl); small_values.append(val)
-
-        summary_total = 0
-        summary_lines = []
-        if small_values:
-            summary_total = sum(small_values)
-            for l, v in zip(small_labels, small_values):
-                summary_lines.append(f"{l}: {v:,.0f} CF")
-            main_labels.append("Otros"); main_values.append(summary_total)
-
-        fig, ax = plt.subplots(figsize=(width, height))
-        wedges, _ = ax.pie(main_values, labels=None, startangle=90,
-                           colors=colors[:len(main_values)],
-                           wedgeprops=dict(width=0.38, edgecolor="white", linewidth=1))
-        ax.set_aspect('equal')
-
-        # --- Etiquetas dentro/fuera ---
-        for i, wedge in enumerate(wedges):
-            ang = (wedge.theta2 + wedge.theta1) / 2
-            theta = np.deg2rad(ang)
-            r = 0.38 / 2 + 0.62
-            x, y = np.cos(theta) * r, np.sin(theta) * r
-
-            if main_labels[i] == "Otros":
-                ax.annotate("Otros", xy=(x, y),
-                            xytext=(1.15*np.cos(theta), 1.15*np.sin(theta)),
-                            ha="center", va="center",
-                            **STYLE["secondary"],
-                            arrowprops=dict(arrowstyle="-", lw=0.6, color="#bbb"))
-            else:
-                ax.text(x, y, f"{main_labels[i]}", ha="center", va="center", **STYLE["labels"])
-
-        # --- Valores afuera ---
-        for i, wedge in enumerate(wedges):
-            if main_labels[i] == "Otros": continue
-            ang = (wedge.theta2 + wedge.theta1) / 2
-            x, y = np.cos(np.deg2rad(ang)), np.sin(np.deg2rad(ang))
-            ax.annotate(f"{main_values[i]:,.0f} CF", xy=(x, y), xytext=(1.25*x, 1.25*y),
-                        ha="center", va="center", **STYLE["labels"],
-                        arrowprops=dict(arrowstyle="-", lw=0.6, color="#bbb"))
-
-        # --- Centro ---
-        ax.text(0, 0.05, f"{total:,.0f}", ha="center", va="center", **STYLE["totals"])
-        ax.text(0, -0.05, f"{indicator}", ha="center", va="center", **STYLE["secondary"])
+        # Las porciones cambian con los datos: se reutiliza solo la figura
+        template = _template(("donut", width, height), lambda: {"fig": Figure(figsize=(width, height))})
+        fig = template["fig"]
+        fig.clear()
+        ax = fig.add_subplot()
+        resumen = _draw_donut(ax, s, indicator, colors)
 
         # --- Título ---
         fig.suptitle(f"{group_by} • {date}", **STYLE["title"], y=0.96)
 
         # --- Resumen de pequeños ---
-        if summary_lines:
-            resumen = "Otros:\n" + "\n".join(summary_lines) + f"\nTotal {summary_total:,.0f} CF"
+        if resumen:
             fig.text(0.95, 0.1, resumen, ha="right", va="bottom",
                      **STYLE["secondary"],
                      bbox=dict(facecolor="white", edgecolor="none", linewidth=0, boxstyle="square,pad=0.3"))
 
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        plt.subplots_adjust(top=0.90, bottom=0.12, left=0.08, right=0.85)
-        filename = f"donut_{group_by}_{indicator}.png"
-        plt.savefig(os.path.join(project_address, filename), dpi=300, bbox_inches="tight")
-        plt.close(fig)
+        fig.subplots_adjust(top=0.90, bottom=0.12, left=0.08, right=0.85)
+        return _save_template(template, project_address, f"donut_{group_by}_{indicator}.png")
     except Exception as e:
         print(f"❌ Error en donut_graphic(): {e}")
+        if strict:
+            raise
 
 
 # ==============================
 # GRÁFICO LOLLIPOP (horizontal)
 # ==============================
+def _lollipop_artists(ax, n, color="#B71C1C"):
+    y = np.arange(n)
+    ax.set_facecolor("white")
+
+    stems = ax.hlines(y=y, xmin=0, xmax=np.zeros(n), color="#b0b0b0", alpha=0.6, linewidth=1.2)
+    dots, = ax.plot(np.zeros(n), y, "o", color=color, markersize=9,
+                    markeredgecolor="white", markeredgewidth=1)
+
+    labels = [
+        ax.annotate("", xy=(0, i), xytext=(12, 0),
+                    textcoords="offset points", ha="left", va="center", **STYLE["labels"])
+        for i in y
+    ]
+
+    for spine in ["top", "right", "left", "bottom"]:
+        ax.spines[spine].set_visible(False)
+
+    ax.grid(axis="x", linestyle="--", linewidth=0.5, alpha=0.3)
+    ax.set_xticks([])
+    ax.set_yticks(y)
+    ax.set_ylim(-0.5, n - 0.5)
+    ax.tick_params(axis="x", which="both", bottom=False, top=False, labelbottom=False)
+
+    return {"ax": ax, "stems": stems, "dots": dots, "labels": labels}
+
+def _lollipop_update(artists, s):
+    ax = artists["ax"]
+    y = np.arange(len(s))
+    values = s.values.astype(float)
+
+    artists["stems"].set_segments([[(0, i), (v, i)] for i, v in zip(y, values)])
+    artists["dots"].set_data(values, y)
+    for label, i, v in zip(artists["labels"], y, values):
+        label.xy = (v, i)
+        label.set_text(f"{v:,.0f} CF")
+
+    top = max(values.max(), 0)
+    ax.set_xlim(-0.05 * top, 1.05 * top or 1)
+    ax.set_yticklabels([str(lbl) for lbl in s.index], **STYLE["ticks"])
+
+def _draw_lollipop(ax, s, color="#B71C1C"):
+    _lollipop_update(_lollipop_artists(ax, len(s), color), s)
+
+@metrics.instrument("lollipop_graphic")
+@_render_cache("lollipop")
 def lollipop_graphic(
         project_address,
         data,          # Serie agregada (ideal) o DataFrame
@@ -224,50 +488,120 @@ def lollipop_graphic(
         indicator,
         width=12,
         height=7,
-        color="#B71C1C"
+        color="#B71C1C",
+        strict=False
     ):
     try:
-        import matplotlib.pyplot as plt
-        import os
-
         # Serie ascendente para lectura de abajo hacia arriba
         s = _ensure_series(data, group_by, indicator, ascending=True)
         if s.empty:
             raise ValueError("Serie de datos vacía para lollipop_graphic().")
 
-        fig, ax = plt.subplots(figsize=(width, height))
-        ax.set_facecolor("white")
+        def build():
+            fig, ax = _new_figure(width, height, facecolor=None)
+            template = _lollipop_artists(ax, len(s), color)
+            # Título estandarizado
+            template["title"] = fig.suptitle("", y=0.96, **STYLE["title"])
+            template["fig"] = fig
+            return template
 
-        ax.hlines(y=s.index, xmin=0, xmax=s.values, color="#b0b0b0", alpha=0.6, linewidth=1.2)
-        ax.plot(s.values, s.index, "o", color=color, markersize=9,
-                markeredgecolor="white", markeredgewidth=1)
+        template = _template(("lollipop", len(s), width, height, color), build)
+        _lollipop_update(template, s)
+        template["title"].set_text(f"{group_by} • {date}")
 
-        for x, y in zip(s.values, s.index):
-            ax.annotate(f"{x:,.0f} CF", xy=(x, y), xytext=(12, 0),
-                        textcoords="offset points", ha="left", va="center", **STYLE["labels"])
-
-        for spine in ["top", "right", "left", "bottom"]:
-            ax.spines[spine].set_visible(False)
-
-        ax.grid(axis="x", linestyle="--", linewidth=0.5, alpha=0.3)
-        ax.set_xticks([])
-        ax.set_yticklabels([str(lbl) for lbl in s.index], **STYLE["ticks"])
-        ax.tick_params(axis="x", which="both", bottom=False, top=False, labelbottom=False)
-
-        # Título estandarizado
-        fig.suptitle(f"{group_by} • {date}", y=0.96, **STYLE["title"])
-
-        plt.tight_layout(rect=[0, 0, 0.95, 0.93], pad=2)
-        filename = f"lollipop_{group_by}_{indicator}.png"
-        plt.savefig(os.path.join(project_address, filename), dpi=300, bbox_inches="tight")
-        plt.close(fig)
+        template["fig"].tight_layout(rect=[0, 0, 0.95, 0.93], pad=2)
+        return _save_template(template, project_address, f"lollipop_{group_by}_{indicator}.png")
 
     except Exception as e:
         print(f"❌ Error en lollipop_graphic(): {e}")
+        if strict:
+            raise
 
 # ==============================
 # GRÁFICO BARRAS HORIZONTALES
 # ==============================
+def _horizontal_bar_artists(ax, n, bar_label=14, bar_fontsize=14, bar_color=None):
+    # --- Paleta Coca-Cola orientada a la marca / productos ---
+    coca_palette = [
+        "#E41A1C",  # Coca-Cola (rojo clásico)
+        "#FFD700",  # Inca Kola (amarillo dorado)
+        "#FF7F0E",  # Fanta (naranja)
+        "#4CAF50",  # Sprite (verde lima)
+        "#1565C0",  # Powerade (azul)
+        "#1C1C1C",  # Coca-Cola Zero (negro)
+        "#B0BEC5",  # Coca-Cola Light (gris claro)
+    ]
+
+    # --- colores dinámicos ---
+    if bar_color is None:
+        colors = [coca_palette[i % len(coca_palette)] for i in range(n)]
+    else:
+        if isinstance(bar_color, (list, tuple)):
+            colors = bar_color[:n]
+        else:
+            colors = [bar_color] * n
+
+    # --- barras horizontales ---
+    y = np.arange(n)
+    bars = ax.barh(
+        y,
+        np.zeros(n),
+        color=colors,
+        edgecolor='none',
+        height=0.7
+    )
+
+    # --- anotaciones (valores) ---
+    labels = [
+        ax.annotate(
+            '',
+            xy=(0, i),
+            xytext=(6, 0),
+            textcoords='offset points',
+            ha='left', va='center',
+            fontsize=bar_fontsize,
+            fontweight='normal',
+            color='#222'
+        )
+        for i in y
+    ]
+
+    # --- estética limpia ---
+    for spine in ["top", "right", "left", "bottom"]:
+        ax.spines[spine].set_visible(False)
+
+    # ticks
+    ax.set_yticks(y)
+    ax.tick_params(axis='y', labelsize=bar_label, colors="#444")
+    ax.tick_params(axis='x', labelbottom=False)
+    ax.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:,.0f}'))
+
+    # grid sutil solo en X
+    ax.grid(axis='x', linestyle='--', linewidth=0.5, alpha=0.25, color='#aaa')
+
+    ax.set_xlabel("")
+    ax.set_ylabel("")
+
+    return {"ax": ax, "bars": bars, "labels": labels}
+
+def _horizontal_bar_update(artists, group_by_indicator):
+    ax = artists["ax"]
+
+    for i, (bar, label, width) in enumerate(zip(artists["bars"], artists["labels"], group_by_indicator.values)):
+        bar.set_width(width)
+        label.xy = (width, i)
+        label.set_text(f'{width:,.1f} CF')
+    ax.relim()
+    ax.autoscale_view()
+
+    ax.set_yticklabels([str(lbl) for lbl in group_by_indicator.index])
+
+def _draw_horizontal_bar(ax, group_by_indicator, bar_label=14, bar_fontsize=14, bar_color=None):
+    artists = _horizontal_bar_artists(ax, len(group_by_indicator), bar_label, bar_fontsize, bar_color)
+    _horizontal_bar_update(artists, group_by_indicator)
+
+@metrics.instrument("horizontal_bar_graphic")
+@_render_cache("barh")
 def horizontal_bar_graphic(
         project_address,
         df,
@@ -278,95 +612,348 @@ def horizontal_bar_graphic(
         bar_height,
         bar_label,
         bar_fontsize,
-        bar_color=None
+        bar_color=None,
+        strict=False
     ):
     try:
-        import matplotlib.pyplot as plt
-        import matplotlib.ticker as mticker
-        import os
-
-        # --- Paleta Coca-Cola orientada a la marca / productos ---
-        coca_palette = [
-            "#E41A1C",  # Coca-Cola (rojo clásico)
-            "#FFD700",  # Inca Kola (amarillo dorado)
-            "#FF7F0E",  # Fanta (naranja)
-            "#4CAF50",  # Sprite (verde lima)
-            "#1565C0",  # Powerade (azul)
-            "#1C1C1C",  # Coca-Cola Zero (negro)
-            "#B0BEC5",  # Coca-Cola Light (gris claro)
-        ]
-
-        # --- datos agregados ordenados ascendente ---
-        group_by_indicator = (
-            df.groupby(group_by)[indicator]
-              .sum()
-              .sort_values(ascending=True)
-        )
+        # --- datos agregados ordenados ascendente (Serie o DataFrame) ---
+        group_by_indicator = _ensure_series(df, group_by, indicator, ascending=True)
+        n = len(group_by_indicator)
 
-        fig, ax = plt.subplots(figsize=(bar_width, bar_height), facecolor="white")
+        def build():
+            fig, ax = _new_figure(bar_width, bar_height)
+            template = _horizontal_bar_artists(ax, n, bar_label, bar_fontsize, bar_color)
+            # --- título estandarizado ---
+            template["title"] = fig.suptitle(
+                "",
+                **STYLE["title"],   # aplica fontsize=14, bold, color="#222"
+                y=0.94              # reduce espacio arriba (igual que donut y lollipop)
+            )
+            template["fig"] = fig
+            return template
 
-        n = len(group_by_indicator)
+        color_key = tuple(bar_color) if isinstance(bar_color, list) else bar_color
+        template = _template(("barh", n, bar_width, bar_height, bar_label, bar_fontsize, color_key), build)
+        _horizontal_bar_update(template, group_by_indicator)
+        template["title"].set_text(f"{group_by} • {date}")
 
-        # --- colores dinámicos ---
-        if bar_color is None:
-            colors = [coca_palette[i % len(coca_palette)] for i in range(n)]
-        else:
-            if isinstance(bar_color, (list, tuple)):
-                colors = bar_color[:n]
-            else:
-                colors = [bar_color] * n
-
-        # --- barras horizontales ---
-        bars = ax.barh(
-            group_by_indicator.index,
-            group_by_indicator.values,
-            color=colors,
-            edgecolor='none',
-            height=0.7
-        )
+        # --- layout sin espacio extra bajo el título ---
+        template["fig"].tight_layout(rect=[0, 0, 0.95, 0.95], pad=0)
 
-        # --- anotaciones (valores) ---
-        for bar in bars:
-            width = bar.get_width()
-            ax.annotate(
-                f'{width:,.1f} CF',
-                xy=(width, bar.get_y() + bar.get_height() / 2),
-                xytext=(6, 0),
-                textcoords='offset points',
-                ha='left', va='center',
-                fontsize=bar_fontsize,
-                fontweight='normal',
-                color='#222'
-            )
+        return _save_template(template, project_address, f'barh_{group_by}_{indicator}.png')
 
-        # --- título estandarizado ---
-        fig.suptitle(
-            f"{group_by} • {date}",
-            **STYLE["title"],   # aplica fontsize=14, bold, color="#222"
-            y=0.94              # reduce espacio arriba (igual que donut y lollipop)
-        )
-        # --- estética limpia ---
-        for spine in ["top", "right", "left", "bottom"]:
-            ax.spines[spine].set_visible(False)
+    except Exception as e:
+        print(f'Cantidad de datos: {len(df)}')
+        print('❌ Error en la generación del gráfico:', e)
+        if strict:
+            raise
 
-        # ticks
-        ax.tick_params(axis='y', labelsize=bar_label, colors="#444")
-        ax.tick_params(axis='x', labelbottom=False)
-        ax.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:,.0f}'))
+# ==============================
+# COMPARACIÓN ENTRE PERIODOS
+# ==============================
+# Serie = diferencia (delta) o crecimiento (%) por categoría contra el periodo
+# anterior. Rojo: más venta perdida que antes; verde: menos.
+INCREASE_COLOR = "#B71C1C"
+DECREASE_COLOR = "#2E7D32"
+
+def _delta_colors(values):
+    return [INCREASE_COLOR if v > 0 else DECREASE_COLOR for v in values]
+
+# Pareto del cambio: barras con signo (mayor cambio absoluto primero)
+# y % acumulado del cambio absoluto. Devuelve el texto del cambio neto.
+def _draw_delta_pareto(ax, s, line_color="#1C1C1C"):
+    s = s.reindex(s.abs().sort_values(ascending=False).index)
+    x = np.arange(len(s))
+    values = s.values.astype(float)
+
+    # --- Barras ---
+    ax.bar(x, values, color=_delta_colors(values), alpha=0.85)
+    ax.axhline(0, color="#666", linewidth=0.8)
+    for i, v in zip(x, values):
+        ax.annotate(f"{v:+,.0f} CF", xy=(i, v), xytext=(0, 4 if v >= 0 else -4),
+                    textcoords="offset points", ha="center", va="bottom" if v >= 0 else "top",
+                    **{**STYLE["labels"], "fontsize": STYLE["labels"]["fontsize"] - 2})
+    ax.margins(y=0.15)
+
+    # --- Línea de Pareto del cambio absoluto ---
+    ax2 = ax.twinx()
+    changes = np.abs(values)
+    cumperc = 100 * np.cumsum(changes) / (changes.sum() or 1)
+    ax2.plot(x, cumperc, marker="o", markersize=6, color=line_color, linewidth=1)
+    ax2.set_ylim(0, 115)
+
+    key = int(np.argmax(cumperc >= 85))
+    ax2.annotate(f"{cumperc[key]:.1f}%", xy=(key, cumperc[key]), xytext=(0, 6),
+                 textcoords="offset points", ha="center", va="bottom",
+                 fontsize=STYLE["labels"]["fontsize"], color=line_color)
+
+    # --- Quitar ejes Y ---
+    ax.yaxis.set_visible(False)
+    ax2.yaxis.set_visible(False)
+    for spine in list(ax.spines.values()) + list(ax2.spines.values()):
+        spine.set_visible(False)
+
+    ax.set_xticks(x)
+    ax.set_xticklabels([str(lbl) for lbl in s.index], rotation=30, ha="right", **STYLE["ticks"])
+    ax.grid(axis="y", linestyle="--", linewidth=0.6, alpha=0.25, color="#aaa")
+
+    return f"Cambio neto: {values.sum():+,.0f} CF"
+
+# Lollipop de crecimiento (%) ordenado de menor a mayor
+def _draw_growth_lollipop(ax, s):
+    y = np.arange(len(s))
+    values = s.values.astype(float)
+    colors = _delta_colors(values)
+    ax.set_facecolor("white")
+
+    ax.hlines(y=y, xmin=0, xmax=values, color=colors, alpha=0.5, linewidth=1.5)
+    ax.scatter(values, y, color=colors, s=81, edgecolors="white", linewidths=1, zorder=3)
+    ax.axvline(0, color="#666", linewidth=0.8)
+
+    for i, v in zip(y, values):
+        ax.annotate(f"{v:+.0f}%", xy=(v, i), xytext=(12 if v >= 0 else -12, 0),
+                    textcoords="offset points", ha="left" if v >= 0 else "right",
+                    va="center", **STYLE["labels"])
+
+    low, high = min(values.min(), 0), max(values.max(), 0)
+    pad = 0.25 * ((high - low) or 1)
+    ax.set_xlim(low - pad, high + pad)
+
+    for spine in ["top", "right", "left", "bottom"]:
+        ax.spines[spine].set_visible(False)
+    ax.grid(axis="x", linestyle="--", linewidth=0.5, alpha=0.3)
+    ax.set_xticks([])
+    ax.set_yticks(y)
+    ax.set_ylim(-0.5, len(s) - 0.5)
+    ax.set_yticklabels([str(lbl) for lbl in s.index], **STYLE["ticks"])
+
+@metrics.instrument("delta_pareto_graphic")
+@_render_cache("delta")
+def delta_pareto_graphic(
+        project_address,
+        data,          # Serie: actual - anterior por categoría
+        date,          # p. ej. "10/2025 vs 9/2025"
+        group_by,
+        indicator,
+        width=11,
+        height=6,
+        line_color="#1C1C1C",
+        strict=False
+    ):
+    try:
+        s = _ensure_series(data, group_by, indicator, ascending=False)
+        if s.empty:
+            raise ValueError("Serie de datos vacía para delta_pareto_graphic().")
 
-        # grid sutil solo en X
-        ax.grid(axis='x', linestyle='--', linewidth=0.5, alpha=0.25, color='#aaa')
+        fig, ax = _new_figure(width, height)
+        resumen = _draw_delta_pareto(ax, s, line_color)
+        ax.set_title(f"{group_by} • {date}\n{resumen}", **STYLE["title"], pad=10)
+        fig.subplots_adjust(top=0.86, bottom=0.24, left=0.06, right=0.98)
 
-        ax.set_xlabel("")
-        ax.set_ylabel("")
+        return _save_template({"fig": fig}, project_address, f"delta_{group_by}_{indicator}.png")
+    except Exception as e:
+        print(f"❌ Error en delta_pareto_graphic(): {e}")
+        if strict:
+            raise
 
-        # --- layout sin espacio extra bajo el título ---
-        plt.tight_layout(rect=[0, 0, 0.95, 0.95], pad=0)
+@metrics.instrument("growth_lollipop_graphic")
+@_render_cache("crecimiento")
+def growth_lollipop_graphic(
+        project_address,
+        data,          # Serie: crecimiento (%) por categoría
+        date,
+        group_by,
+        indicator,
+        width=12,
+        height=7,
+        strict=False
+    ):
+    try:
+        # Serie ascendente para lectura de abajo hacia arriba
+        s = _ensure_series(data, group_by, indicator, ascending=True)
+        if s.empty:
+            raise ValueError("Serie de datos vacía para growth_lollipop_graphic().")
+
+        fig, ax = _new_figure(width, height, facecolor=None)
+        _draw_growth_lollipop(ax, s)
+        fig.suptitle(f"{group_by} • Crecimiento {date}", y=0.96, **STYLE["title"])
+        fig.tight_layout(rect=[0, 0, 0.95, 0.93], pad=2)
+
+        return _save_template({"fig": fig}, project_address, f"crecimiento_{group_by}_{indicator}.png")
+    except Exception as e:
+        print(f"❌ Error en growth_lollipop_graphic(): {e}")
+        if strict:
+            raise
+
+# ==============================
+# TENDENCIA DIARIA / MAPA DE CALOR
+# ==============================
+# data = pivot fecha × serie (ruta_panel._daily_pivot), columnas ordenadas
+# de mayor a menor total. Todas las series se dibujan en una sola llamada.
+
+def _date_ticks(ax, index, axis="x", max_ticks=12):
+    positions = np.unique(np.linspace(0, len(index) - 1, min(max_ticks, len(index))).astype(int))
+    labels = [index[i].strftime("%d/%m") for i in positions]
+    if axis == "x":
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels, rotation=30, ha="right", **STYLE["ticks"])
+
+def _draw_trend(ax, data, colormap="tab20"):
+    n = data.shape[1]
+    colors = matplotlib.colormaps[colormap](np.arange(n) % 20)
+    ax.set_prop_cycle(color=colors)
+
+    x = np.arange(len(data))
+    lines = ax.plot(x, data.to_numpy(dtype=float), linewidth=1.6, marker="o" if len(data) <= 31 else None, markersize=3)
+    ax.legend(lines, [str(c) for c in data.columns], loc="upper left", bbox_to_anchor=(1.01, 1.0),
+              frameon=False, fontsize=STYLE["secondary"]["fontsize"], ncol=1 + n // 20)
+
+    for spine in ["top", "right"]:
+        ax.spines[spine].set_visible(False)
+    ax.grid(axis="y", linestyle="--", linewidth=0.5, alpha=0.3, color="#aaa")
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    ax.tick_params(axis="y", labelsize=STYLE["ticks"]["fontsize"], colors=STYLE["ticks"]["color"])
+    ax.set_xlim(-0.5, len(data) - 0.5)
+    _date_ticks(ax, data.index)
+
+def _draw_heatmap(ax, data, colormap="Reds"):
+    image = ax.imshow(data.to_numpy(dtype=float).T, aspect="auto", cmap=colormap, interpolation="nearest")
+
+    ax.set_yticks(np.arange(data.shape[1]))
+    ax.set_yticklabels([str(c) for c in data.columns], **STYLE["ticks"])
+    _date_ticks(ax, data.index)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    colorbar = ax.figure.colorbar(image, ax=ax, fraction=0.03, pad=0.01)
+    colorbar.ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    colorbar.outline.set_visible(False)
+
+@metrics.instrument("trend_graphic")
+@_render_cache("tendencia")
+def trend_graphic(
+        project_address,
+        data,          # pivot fecha × serie
+        date,
+        group_by,
+        indicator,
+        width=14,
+        height=7,
+        strict=False
+    ):
+    try:
+        if data.empty:
+            raise ValueError("Pivot de datos vacío para trend_graphic().")
+
+        fig, ax = _new_figure(width, height)
+        _draw_trend(ax, data)
+        ax.set_title(f"{group_by} • {date}", **STYLE["title"], pad=10)
+        fig.tight_layout(pad=1.5)
+
+        return _save_template({"fig": fig}, project_address, f"tendencia_{group_by}_{indicator}.png")
+    except Exception as e:
+        print(f"❌ Error en trend_graphic(): {e}")
+        if strict:
+            raise
+
+@metrics.instrument("heatmap_graphic")
+@_render_cache("calor")
+def heatmap_graphic(
+        project_address,
+        data,          # pivot fecha × serie
+        date,
+        group_by,
+        indicator,
+        width=14,
+        height=7,
+        colormap="Reds",
+        strict=False
+    ):
+    try:
+        if data.empty:
+            raise ValueError("Pivot de datos vacío para heatmap_graphic().")
+
+        fig, ax = _new_figure(width, height)
+        _draw_heatmap(ax, data, colormap)
+        ax.set_title(f"{group_by} • {date}", **STYLE["title"], pad=10)
+        fig.tight_layout(pad=1.5)
 
-        filename = f'barh_{group_by}_{indicator}.png'
-        plt.savefig(os.path.join(project_address, filename), dpi=300, bbox_inches='tight')
+        return _save_template({"fig": fig}, project_address, f"calor_{group_by}_{indicator}.png")
+    except Exception as e:
+        print(f"❌ Error en heatmap_graphic(): {e}")
+        if strict:
+            raise
+
+# ==============================
+# DASHBOARD COMPUESTO / PDF
+# ==============================
+# Todos los reportes en una sola salida:
+#   mode="png" -> una figura con un subplot por reporte
+#   mode="pdf" -> un PDF con una página por reporte (PdfPages)
+# panels = [{"kind": "pareto", "data": Serie, "group_by": ..., "options": {...}}]
+_DRAW = {
+    "pareto": _draw_pareto,
+    "donut": _draw_donut,
+    "lollipop": _draw_lollipop,
+    "barh": _draw_horizontal_bar,
+    "delta": _draw_delta_pareto,
+    "crecimiento": _draw_growth_lollipop,
+}
+_ASCENDING = {"lollipop": True, "barh": True, "crecimiento": True}
+
+def _draw_panel(ax, panel, indicator):
+    s = _ensure_series(panel["data"], panel["group_by"], indicator,
+                       ascending=_ASCENDING.get(panel["kind"], False))
+    if s.empty:
+        raise ValueError(f"Serie de datos vacía para {panel['group_by']}.")
+
+    resumen = _DRAW[panel["kind"]](ax, s, **panel.get("options", {}))
+    if resumen:
+        ax.text(1.02, 0.0, resumen, transform=ax.transAxes, ha="left", va="bottom",
+                **STYLE["secondary"])
+
+@metrics.instrument("dashboard_graphic")
+def dashboard_graphic(
+        project_address,
+        panels,
+        date,
+        indicator,
+        mode="png",
+        width=22,
+        height=14,
+        strict=False
+    ):
+    try:
+        if mode == "pdf":
+            filename = f"reporte_{indicator}.pdf"
+            with PdfPages(os.path.join(project_address, filename)) as pdf:
+                for panel in panels:
+                    fig, ax = plt.subplots(figsize=(11, 7), facecolor="white")
+                    _draw_panel(ax, panel, indicator)
+                    fig.suptitle(f"{panel['group_by']} • {date}", **STYLE["title"], y=0.96)
+                    pdf.savefig(fig, bbox_inches="tight")
+                    plt.close(fig)
+            return os.path.join(project_address, filename)
+
+        cols = min(2, len(panels))
+        rows = -(-len(panels) // cols)
+        fig, axes = plt.subplots(rows, cols, figsize=(width, height * rows / 2), facecolor="white", squeeze=False)
+
+        for ax, panel in zip(axes.flat, panels):
+            _draw_panel(ax, panel, indicator)
+            ax.set_title(panel["group_by"], **STYLE["title"], pad=12)
+        for ax in list(axes.flat)[len(panels):]:
+            ax.set_visible(False)
+
+        fig.suptitle(f"{indicator} • {date}", **{**STYLE["title"], "fontsize": 18}, y=1.0)
+        fig.tight_layout(pad=3)
+
+        filename = f"dashboard_{indicator}.png"
+        fig.savefig(os.path.join(project_address, filename), dpi=200, bbox_inches="tight")
         plt.close(fig)
+        return os.path.join(project_address, filename)
 
     except Exception as e:
-        print(f'Cantidad de datos: {len(df)}')
-        print('❌ Error en la generación del gráfico:', e)  
\ No newline at end of file
+        print(f"❌ Error en dashboard_graphic(): {e}")
+        if strict:
+            raise
@@ -0,0 +1,108 @@
+# OPTIMIZACIÓN DE IMÁGENES PARA EL ENVÍO
+#
+# Los gráficos se guardan a 300 dpi (originales para archivo). Antes de
+# enviarlos por WhatsApp se generan variantes livianas en una subcarpeta,
+# según un perfil de salida.
+
+import io
+import os
+import glob
+import shutil
+from PIL import Image
+
+OUTPUT_PROFILES = {
+    # JPEG reducido con presupuesto de bytes (WhatsApp recomprime igual)
+    "whatsapp": {"format": "JPEG", "max_width": 1600, "max_bytes": 250 * 1024},
+    # PNG con paleta cuantizada (texto y líneas nítidas)
+    "png_paleta": {"format": "PNG", "max_width": 1600, "colors": 128},
+    # WebP con presupuesto de bytes
+    "webp": {"format": "WEBP", "max_width": 1600, "max_bytes": 150 * 1024},
+}
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+# Adjuntos que no son gráficos PNG (p. ej. el reporte PDF): se copian sin cambios
+PASSTHROUGH_PATTERNS = ("*.pdf", "*.jpg", "*.jpeg", "*.webp")
+
+# Reducir resolución (equivale a bajar el dpi) manteniendo la proporción
+def _resize(image, max_width):
+    if max_width and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.LANCZOS)
+    return image
+
+def _encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, optimize=True, **kwargs)
+    return buffer.getvalue()
+
+# Mayor calidad que entra en el presupuesto de bytes (búsqueda binaria)
+def _encode_with_budget(image, fmt, max_bytes, min_quality=40, max_quality=95):
+    best = _encode(image, fmt, quality=min_quality)
+    low, high = min_quality + 1, max_quality
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode(image, fmt, quality=quality)
+        if len(data) <= max_bytes:
+            best, low = data, quality + 1
+        else:
+            high = quality - 1
+    return best
+
+def optimize_image(path, output_address, profile):
+    fmt = profile["format"]
+
+    with Image.open(path) as image:
+        image = _resize(image.convert("RGBA"), profile.get("max_width"))
+
+        if fmt == "PNG":
+            image = image.convert("RGB").quantize(colors=profile.get("colors", 256))
+            data = _encode(image, fmt)
+        else:
+            # Sin transparencia: fondo blanco
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            data = _encode_with_budget(background, fmt, profile["max_bytes"])
+
+    name = os.path.splitext(os.path.basename(path))[0] + EXTENSIONS[fmt]
+    output_path = os.path.join(output_address, name)
+    with open(output_path, "wb") as f:
+        f.write(data)
+
+    return output_path
+
+# Generar las variantes de todos los PNG de project_address en 'output_folder'
+# (el resto de los adjuntos se copia tal cual)
+# Devuelve la carpeta con los archivos a enviar
+def optimize_graphics(project_address, profile_name="whatsapp", output_folder="envio"):
+    profile = OUTPUT_PROFILES[profile_name]
+    output_address = os.path.join(project_address, output_folder)
+    os.makedirs(output_address, exist_ok=True)
+
+    # Adjuntos de una ejecución anterior (otros archivos, como la cola de
+    # envíos persistente, se conservan)
+    old_patterns = {"*" + extension for extension in EXTENSIONS.values()} | set(PASSTHROUGH_PATTERNS)
+    for pattern in sorted(old_patterns):
+        for old_file in glob.glob(os.path.join(output_address, pattern)):
+            os.remove(old_file)
+
+    original_total, optimized_total = 0, 0
+    for path in sorted(glob.glob(os.path.join(project_address, "*.png"))):
+        output_path = optimize_image(path, output_address, profile)
+
+        original = os.path.getsize(path)
+        optimized = os.path.getsize(output_path)
+        original_total += original
+        optimized_total += optimized
+        print(f"[*] {os.path.basename(path)}: {original / 1024:,.0f} KB -> {optimized / 1024:,.0f} KB")
+
+    for pattern in PASSTHROUGH_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(project_address, pattern))):
+            shutil.copy2(path, output_address)
+            print(f"[*] {os.path.basename(path)}: copiado sin cambios")
+
+    if original_total:
+        saved = original_total - optimized_total
+        print(f"[✓] Perfil '{profile_name}': {saved / 1024:,.0f} KB ahorrados ({100 * saved / original_total:.0f}%)")
+
+    return output_address
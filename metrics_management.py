@@ -0,0 +1,106 @@
+# INSTRUMENTACIÓN DE LA EJECUCIÓN
+#
+# Registra por etapa: tiempo, memoria pico (RSS) y filas de entrada/salida.
+# Al final de la ejecución run_report() muestra un resumen y guarda una
+# traza JSON para detectar regresiones en producción.
+
+import os
+import json
+import time
+import functools
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+# Traza por defecto (se sobrescribe en cada ejecución)
+TRACE_FILE = 'traza_ejecucion.json'
+
+# Estado de la ejecución (sobrevive a importlib.reload())
+_RUN = globals().get('_RUN') or {"started": time.time(), "records": [], "depth": 0}
+
+# Memoria pico del proceso en MB (None si no se puede medir)
+# Linux/macOS: ru_maxrss; Windows: peak_wset de psutil (rss es la actual, no el pico)
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB, macOS: bytes
+        return round(peak / 1024 if os.uname().sysname != 'Darwin' else peak / 1024 ** 2, 1)
+    if psutil is not None:
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        return None if peak is None else round(peak / 1024 ** 2, 1)
+    return None
+
+def _rows(value):
+    # get_specific_date devuelve (df, date)
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+def reset_run():
+    _RUN["started"] = time.time()
+    _RUN["records"] = []
+    _RUN["depth"] = 0
+
+@contextmanager
+def record(stage, rows_in=None):
+    entry = {"stage": stage, "depth": _RUN["depth"], "rows_in": rows_in, "rows_out": None}
+    _RUN["records"].append(entry)
+    _RUN["depth"] += 1
+    started = time.perf_counter()
+    try:
+        yield entry
+        entry["status"] = "ok"
+    except BaseException as e:
+        entry["status"] = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _RUN["depth"] -= 1
+        entry["seconds"] = round(time.perf_counter() - started, 4)
+        entry["peak_rss_mb"] = peak_rss_mb()
+
+# Decorador para funciones del pipeline
+def instrument(stage):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = next((n for n in map(_rows, list(args) + list(kwargs.values())) if n is not None), None)
+            with record(stage, rows_in) as entry:
+                result = func(*args, **kwargs)
+                entry["rows_out"] = _rows(result)
+                return result
+        return wrapper
+    return decorator
+
+# Resumen en consola + traza JSON
+def run_report(trace_path=None, show=True):
+    report = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_RUN["started"])),
+        "total_seconds": round(time.time() - _RUN["started"], 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": list(_RUN["records"]),
+    }
+
+    if show:
+        import print_management as pm
+        pm.show_run_report(report)
+
+    if trace_path:
+        os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return report
@@ -31,6 +31,40 @@ def show_df(df):
     console.print(Panel.fit(table, title="📊 Resumen de DataFrame"))
     console.print(Panel.fit(resumen, title="📎 Resumen", border_style="grey50"))
 
+# Resumen de la ejecución (metrics_management.run_report)
+def show_run_report(report):
+    console = Console()
+
+    table = Table(show_header=True, header_style="bold white on dark_red", box=box.SQUARE)
+    table.add_column("⏱️ Etapa", style="bold cyan", no_wrap=True)
+    table.add_column("Tiempo (s)", justify="right", style="yellow")
+    table.add_column("RSS pico (MB)", justify="right", style="magenta")
+    table.add_column("Filas entrada", justify="right", style="green")
+    table.add_column("Filas salida", justify="right", style="green")
+    table.add_column("Estado", style="white")
+
+    def fmt(value, spec=""):
+        return "-" if value is None else format(value, spec)
+
+    for entry in report["stages"]:
+        status = entry.get("status", "")
+        table.add_row(
+            "  " * entry["depth"] + entry["stage"],
+            fmt(entry.get("seconds"), ".3f"),
+            fmt(entry.get("peak_rss_mb"), ",.1f"),
+            fmt(entry.get("rows_in"), ","),
+            fmt(entry.get("rows_out"), ","),
+            status if status == "ok" else f"[bold red]{status}[/bold red]",
+        )
+
+    resumen = (
+        f"[bold yellow]⏱️ Tiempo total:[/bold yellow] {report['total_seconds']:.2f} s\n"
+        f"[bold green]💾 RSS pico:[/bold green] {fmt(report['peak_rss_mb'], ',.1f')} MB"
+    )
+
+    console.print(Panel.fit(table, title="📊 Reporte de ejecución"))
+    console.print(Panel.fit(resumen, title="📎 Resumen", border_style="grey50"))
+
 def show_document(document):
     # Preparar datos para tabla
     rows = [(k, ", ".join(v) if isinstance(v, list) else v) for k, v in document.items()]
@@ -0,0 +1,139 @@
+import os
+import json
+import pandas as pd
+
+INDICATOR = "Venta Perdida CF"
+
+# ==========================
+# ROLLUP DE VENTA PERDIDA
+# ==========================
+# Sumas diarias de 'Venta Perdida CF' por (Día, Locación, dimensión) para cada
+# dimensión de document['group_by']. Los reportes consultan estas pocas filas
+# pre-agregadas en lugar de volver a agrupar todas las filas crudas.
+
+# Construir el rollup en una sola pasada sobre las filas crudas
+def build_rollup(df, document):
+    date = document['date']
+    keys = [date, 'Locación'] + document['group_by']
+
+    # Grano más fino (una pasada); cada dimensión se re-agrega desde aquí
+    base = df.groupby(keys, observed=True, dropna=False)[INDICATOR].sum()
+
+    rollup = {}
+    for group_by in document['group_by']:
+        rollup[group_by] = (
+            base.groupby(level=[date, 'Locación', group_by], observed=True)
+            .sum()
+            .reset_index()
+        )
+    return rollup
+
+# ==========================
+# ROLLUP PERSISTIDO
+# ==========================
+# Se guarda junto al store incremental (<csv>_rollup/<dimensión>.parquet) y
+# cada ingesta le suma solo las filas nuevas (files_management.update_store):
+# los reportes lo cargan en lugar de volver a agrupar todas las filas crudas.
+
+def get_rollup_address(file, root_address):
+    return os.path.splitext(os.path.join(root_address, file['file_name']))[0] + '_rollup'
+
+# Guardar el rollup (un parquet por dimensión + _meta.json)
+def save_rollup(rollup, rollup_address, meta=None):
+    os.makedirs(rollup_address, exist_ok=True)
+    for group_by, data in rollup.items():
+        path = os.path.join(rollup_address, f'{group_by}.parquet')
+        data.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    meta_path = os.path.join(rollup_address, '_meta.json')
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(dict(meta or {}, group_by=list(rollup)), f, ensure_ascii=False, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def read_rollup_meta(rollup_address):
+    try:
+        with open(os.path.join(rollup_address, '_meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Cargar el rollup guardado
+def load_rollup(rollup_address, document):
+    return {
+        group_by: pd.read_parquet(os.path.join(rollup_address, f'{group_by}.parquet'))
+        for group_by in document['group_by']
+    }
+
+# Sumar al rollup un rollup de filas nuevas (mismas claves -> se suman)
+def merge_rollup(rollup, new_rollup, document):
+    date = document['date']
+
+    merged = {}
+    for group_by in document['group_by']:
+        keys = [date, 'Locación', group_by]
+        data = pd.concat([rollup[group_by], new_rollup[group_by]], ignore_index=True)
+        merged[group_by] = (
+            data.groupby(keys, observed=True, dropna=False)[INDICATOR]
+            .sum()
+            .reset_index()
+            .astype({'Locación': 'category', group_by: 'category'})
+        )
+    return merged
+
+# Solo las filas de 'locations' (p. ej. alertas de una locación)
+def select_locations(rollup, locations):
+    return {
+        group_by: data[data['Locación'].isin(locations)]
+        for group_by, data in rollup.items()
+    }
+
+# Consultar una dimensión para un rango de fechas (inclusivo) y locaciones
+def query_rollup(rollup, document, group_by, started_date=None, ended_date=None, locations=None):
+    data = rollup[group_by]
+    date = document['date']
+
+    mask = pd.Series(True, index=data.index)
+    if started_date is not None:
+        mask &= data[date] >= started_date
+    if ended_date is not None:
+        mask &= data[date] <= ended_date
+    if locations is not None:
+        mask &= data['Locación'].isin(locations)
+
+    return (
+        data[mask]
+        .groupby(group_by, observed=True)[INDICATOR]
+        .sum()
+        .sort_values(ascending=False)
+    )
+
+# Series agregadas para todas las dimensiones (entrada de ruta_panel.main)
+def query_all(rollup, document, started_date=None, ended_date=None, locations=None):
+    return {
+        group_by: query_rollup(rollup, document, group_by, started_date, ended_date, locations)
+        for group_by in document['group_by']
+    }
+
+# ==========================
+# COMPARACIÓN ENTRE PERIODOS
+# ==========================
+# Ambas ventanas salen del mismo rollup: agregar una ventana más solo filtra
+# sus filas diarias, no vuelve a agrupar los datos crudos.
+
+# current / previous = (started_date, ended_date)
+# Columnas: actual, anterior, delta y crecimiento (% sobre el anterior; NaN si era 0)
+def compare_rollup(rollup, document, group_by, current, previous, locations=None):
+    actual = query_rollup(rollup, document, group_by, *current, locations)
+    anterior = query_rollup(rollup, document, group_by, *previous, locations)
+
+    data = pd.concat({'actual': actual, 'anterior': anterior}, axis=1).fillna(0)
+    data['delta'] = data['actual'] - data['anterior']
+    data['crecimiento'] = 100 * data['delta'] / data['anterior'].where(data['anterior'] != 0)
+    return data.sort_values('delta', ascending=False)
+
+def compare_all(rollup, document, current, previous, locations=None, group_bys=None):
+    return {
+        group_by: compare_rollup(rollup, document, group_by, current, previous, locations)
+        for group_by in (group_bys or document['group_by'])
+    }
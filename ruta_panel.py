@@ -1,39 +1,85 @@
 # ANALISIS PARA VENTAS PERDIDAS
 
+import numpy as np
 import pandas as pd
 import graphics as myg
 import importlib
+import metrics_management as metrics
+import rollup_management as rm
+from concurrent.futures import ProcessPoolExecutor
 
 # ==========================
 # PARSEAR LA FECHA
 # ==========================
+@metrics.instrument("parse_date")
 def parse_date(document, df):
+    # Ya tipada (cache parquet / ingesta incremental) -> no reprocesar
+    if pd.api.types.is_datetime64_any_dtype(df[document['date']]):
+        return df
+
     df[document['date']] = pd.to_datetime(
         df[document['date']], format='%Y-%m-%d', errors='coerce'
     )
     return df
 
 # ==========================
-# REPORTES ESPECIALIZADOS
+# AGREGACIÓN
 # ==========================
 
-# --- MOTIVO DE ANULACIÓN ---
-# Muchos motivos → Pareto
-def report_motivo(project_address, df, date, group_by):
-    indicator = "Venta Perdida CF"
-    data = (
-        df.groupby(group_by)[indicator]
+# Suma de 'indicator' por 'group_by' (acepta DataFrame o Serie ya agregada)
+def _sum_by(data, group_by, indicator):
+    if isinstance(data, pd.Series):
+        return data.sort_values(ascending=False)
+    return (
+        data.groupby(group_by, observed=True)[indicator]
         .sum()
         .sort_values(ascending=False)
     )
 
+# Top N de 'indicator' por 'group_by' + "Otros" con el resto exacto
+# Selección parcial O(n) (argpartition) en vez de ordenar todas las categorías;
+# solo se ordenan las N elegidas. La Serie resultante va directo al gráfico,
+# que respeta su orden ("Otros" al final).
+def _top_n(data, group_by, indicator, top_n=10, otros=True):
+    if isinstance(data, pd.Series):
+        s = data
+    else:
+        s = data.groupby(group_by, observed=True)[indicator].sum()
+
+    values = s.to_numpy(dtype=float)
+    remainder = None
+    if 0 < top_n < len(values):
+        positions = np.argpartition(-values, top_n - 1)[:top_n]
+        rest = np.ones(len(values), dtype=bool)
+        rest[positions] = False
+        remainder = values[rest].sum()
+        s = s.iloc[positions]
+
+    top = s.astype(float).sort_values(ascending=False)
+    if otros and remainder is not None:
+        top = pd.concat([top, pd.Series({"Otros": remainder})])
+    top.attrs["ordenada"] = True
+    return top
+
+def _data_sum(df, group_by):
+    return _sum_by(df, group_by, "Venta Perdida CF")
+
+# ==========================
+# REPORTES ESPECIALIZADOS
+# ==========================
+
+# --- MOTIVO DE ANULACIÓN ---
+# Muchos motivos → Pareto
+def _data_motivo(df, group_by):
     # Top 10 + "Otros"
-    top_n = 10
-    top_data = data.head(top_n)
-    otros = pd.Series({"Otros": data.iloc[top_n:].sum()})
-    final_data = pd.concat([top_data, otros])
+    return _top_n(df, group_by, "Venta Perdida CF", top_n=10)
+
+@metrics.instrument("report_motivo")
+def report_motivo(project_address, df, date, group_by, strict=False):
+    indicator = "Venta Perdida CF"
+    final_data = _data_motivo(df, group_by)
 
-    myg.pareto_graphic(
+    return myg.pareto_graphic(
         project_address,
         final_data,
         date,
@@ -41,28 +87,28 @@ def report_motivo(project_address, df, date, group_by):
         indicator,
         width=10,
         height=7,
+        strict=strict,
     )
 
 # --- TRANSPORTISTA ---
 # Número limitado (≤10) → Donut
-def report_transportista(project_address, df, date, group_by):
+TRANSPORTISTA_COLORS = [
+    "#E41A1C",  # Coca-Cola
+    "#FF7F00",  # Fanta
+    "#4CAF50",  # Sprite
+    "#1565C0",  # Powerade
+    "#B0BEC5",  # Coca-Cola Light
+    "#FDCE4A"   # Coca-Cola Zero
+]
+
+@metrics.instrument("report_transportista")
+def report_transportista(project_address, df, date, group_by, strict=False):
     indicator = "Venta Perdida CF"
-    data = (
-        df.groupby(group_by)[indicator]
-        .sum()
-        .sort_values(ascending=False)
-    )
+    data = _sum_by(df, group_by, indicator)
 
-    colors = [
-        "#E41A1C",  # Coca-Cola
-        "#FF7F00",  # Fanta
-        "#4CAF50",  # Sprite
-        "#1565C0",  # Powerade
-        "#B0BEC5",  # Coca-Cola Light
-        "#FDCE4A"   # Coca-Cola Zero
-    ]
+    colors = list(TRANSPORTISTA_COLORS)
 
-    myg.donut_graphic(
+    return myg.donut_graphic(
         project_address,
         data,
         date,
@@ -71,19 +117,17 @@ def report_transportista(project_address, df, date, group_by):
         colors,
         width=7,
         height=7,
+        strict=strict,
     )
 
 # --- RUTA TRONCAL DINÁMICO ---
 # Entre 10–15 categorías → Lollipop
-def report_ruta(project_address, df, date, group_by):
+@metrics.instrument("report_ruta")
+def report_ruta(project_address, df, date, group_by, strict=False):
     indicator = "Venta Perdida CF"
-    data = (
-        df.groupby(group_by)[indicator]
-        .sum()
-        .sort_values(ascending=False)
-    )
+    data = _sum_by(df, group_by, indicator)
 
-    myg.lollipop_graphic(
+    return myg.lollipop_graphic(
         project_address,
         data,
         date,
@@ -91,12 +135,18 @@ def report_ruta(project_address, df, date, group_by):
         indicator,
         width=12,
         height=7,
-        color="#B71C1C"  # Rojo oscuro fuerte
+        color="#B71C1C",  # Rojo oscuro fuerte
+        strict=strict,
     )
 
 # --- CLIENTE ---
 # Demasiados clientes → Top N + "Otros" en barras horizontales
-def report_cliente(project_address, df, date, group_by, top_n=10):
+# "Otros" = resto exacto de los clientes fuera del Top N (otros=False lo omite)
+def _data_cliente(df, group_by, top_n=10, otros=True):
+    return _top_n(df, group_by, "Venta Perdida CF", top_n=top_n, otros=otros)
+
+@metrics.instrument("report_cliente")
+def report_cliente(project_address, df, date, group_by, top_n=10, otros=True, strict=False):
     # CONFIGURACIÓN (estandarizada)
     bar_width = 12
     bar_height = 7
@@ -107,18 +157,10 @@ def report_cliente(project_address, df, date, group_by, top_n=10):
     indicator = "Venta Perdida CF"
 
     # --- calcular top N ---
-    top_clientes = (
-        df.groupby(group_by)[indicator]
-          .sum()
-          .sort_values(ascending=False)
-          .head(top_n)
-          .index
-    )
-
-    df_top = df[df[group_by].isin(top_clientes)]
+    df_top = _data_cliente(df, group_by, top_n, otros)
 
     # --- gráfico ---
-    myg.horizontal_bar_graphic(
+    return myg.horizontal_bar_graphic(
         project_address,
         df_top,
         date,
@@ -128,23 +170,180 @@ def report_cliente(project_address, df, date, group_by, top_n=10):
         bar_height,
         bar_label,
         bar_fontsize,
-        bar_color
+        bar_color,
+        strict=strict,
     )
 
+# Reporte asignado a cada dimensión de document["group_by"]
+REPORTS = {
+    "Motivo de anulación": report_motivo,
+    "Código Transportista": report_transportista,
+    "Ruta Troncal Dinámico": report_ruta,
+    "Cliente": report_cliente,
+}
+
 # ==========================
 # FUNCIÓN PRINCIPAL
 # ==========================
-def main(project_address, df, document, date):
+# 'aggregates' (opcional): {group_by: Serie} pre-agregada, p. ej. desde
+# rollup_management.query_all(); evita agrupar las filas crudas
+# Devuelve las rutas de los gráficos generados (los fallidos no aparecen)
+def main(project_address, df, document, date, aggregates=None):
+    importlib.reload(myg)
+
+    paths = []
+    for group_by, report in REPORTS.items():
+        if group_by in document["group_by"]:
+            data = aggregates[group_by] if aggregates is not None else df
+            paths.append(report(project_address, data, date, group_by))
+
+    return [path for path in paths if path]
+
+# ==========================
+# COMPARACIÓN ENTRE PERIODOS
+# ==========================
+# Delta Pareto + lollipop de crecimiento por dimensión. Las dos ventanas salen
+# de un único rollup de sumas diarias (se construye una vez si no se pasa).
+COMPARE_GROUPS = ["Motivo de anulación", "Código Transportista", "Ruta Troncal Dinámico"]
+
+# current / previous = (started_date, ended_date); labels = (texto actual, texto anterior)
+@metrics.instrument("main_comparison")
+def main_comparison(project_address, df, document, current, previous, labels, rollup=None, locations=None, top_n=15):
     importlib.reload(myg)
+    indicator = "Venta Perdida CF"
+    date = f"{labels[0]} vs {labels[1]}"
+
+    if rollup is None:
+        rollup = rm.build_rollup(df, document)
+
+    group_bys = [g for g in COMPARE_GROUPS if g in document["group_by"]]
+    comparison = rm.compare_all(rollup, document, current, previous, locations, group_bys)
+
+    paths = []
+    for group_by, data in comparison.items():
+        # Sin rechazos en ninguna de las dos ventanas
+        if data.empty:
+            continue
+
+        # Mayores cambios absolutos
+        delta = data["delta"]
+        delta = delta[delta.abs().nlargest(top_n).index]
+        paths.append(myg.delta_pareto_graphic(project_address, delta, date, group_by, indicator))
+
+        # Crecimiento solo para categorías con base en el periodo anterior
+        growth = data["crecimiento"].dropna()
+        growth = growth[growth.abs().nlargest(top_n).index]
+        if not growth.empty:
+            paths.append(myg.growth_lollipop_graphic(project_address, growth, date, group_by, indicator))
+
+    return [path for path in paths if path]
+
+# ==========================
+# TENDENCIA DIARIA
+# ==========================
+# Un solo groupby (día × serie) + unstack por gráfico; los días sin
+# rechazos quedan en 0 (asfreq) para que las líneas no salten fechas.
+
+# Pivot fecha × 'column' de la suma del indicador (columnas de mayor a menor total)
+def _daily_pivot(df, document, column, freq="D"):
+    indicator = "Venta Perdida CF"
+    date = document["date"]
+
+    data = (
+        df.groupby([pd.Grouper(key=date, freq=freq), column], observed=True)[indicator]
+        .sum()
+        .unstack(column, fill_value=0)
+        .asfreq(freq, fill_value=0)
+    )
+    data = data[data.sum().sort_values(ascending=False).index]
+    # Códigos leídos como float (5678.0) -> '5678', como en el donut
+    data.columns = [str(c).removesuffix('.0') for c in data.columns]
+    data.attrs["pivot"] = True
+    return data
+
+# Gráfico de tendencia de cada dimensión (solo las de document["group_by"];
+# Locación siempre, como vista general)
+ALWAYS_TRENDS = ("Locación",)
+TRENDS = {
+    "Locación": "trend",
+    "Código Transportista": "trend",
+    "Ruta Troncal Dinámico": "heatmap",
+}
+
+@metrics.instrument("main_trends")
+def main_trends(project_address, df, document, date, freq="D"):
+    importlib.reload(myg)
+    indicator = "Venta Perdida CF"
+    draw = {"trend": myg.trend_graphic, "heatmap": myg.heatmap_graphic}
+
+    paths = []
+    for column, kind in TRENDS.items():
+        if column not in df.columns or (column not in document["group_by"] and column not in ALWAYS_TRENDS):
+            continue
+        data = _daily_pivot(df, document, column, freq)
+        paths.append(draw[kind](project_address, data, date, column, indicator))
+
+    return [path for path in paths if path]
+
+# ==========================
+# DASHBOARD COMPUESTO / PDF
+# ==========================
+# Mismos datos y estilo que cada report_*, dibujados como paneles de una
+# sola figura (mode="png") o páginas de un PDF (mode="pdf")
+PANELS = {
+    "Motivo de anulación": ("pareto", _data_motivo, {}),
+    "Código Transportista": ("donut", _data_sum, {"indicator": "Venta Perdida CF", "colors": TRANSPORTISTA_COLORS}),
+    "Ruta Troncal Dinámico": ("lollipop", _data_sum, {"color": "#B71C1C"}),
+    "Cliente": ("barh", _data_cliente, {"bar_label": 14, "bar_fontsize": 14, "bar_color": None}),
+}
+
+@metrics.instrument("main_dashboard")
+def main_dashboard(project_address, df, document, date, mode="png", aggregates=None):
+    indicator = "Venta Perdida CF"
+
+    panels = []
+    for group_by, (kind, data_fn, options) in PANELS.items():
+        if group_by in document["group_by"]:
+            data = aggregates[group_by] if aggregates is not None else df
+            data = data_fn(data, group_by)
+            panels.append({"kind": kind, "data": data, "group_by": group_by, "options": options})
+
+    return myg.dashboard_graphic(project_address, panels, date, indicator, mode=mode)
+
+# ==========================
+# RENDER EN PARALELO
+# ==========================
+# matplotlib retiene el GIL: cada gráfico se dibuja en un proceso aparte
+# (backend Agg). Solo viaja la Serie agregada, no el DataFrame.
+
+def _init_render_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _render_report(project_address, data, date, group_by):
+    return REPORTS[group_by](project_address, data, date, group_by, strict=True)
+
+# Devuelve ({group_by: ruta_png}, {group_by: error})
+@metrics.instrument("main_parallel")
+def main_parallel(project_address, df, document, date, aggregates=None, max_workers=None):
+    indicator = "Venta Perdida CF"
+    group_bys = [g for g in REPORTS if g in document["group_by"]]
 
-    if "Motivo de anulación" in document["group_by"]:
-        report_motivo(project_address, df, date, "Motivo de anulación")
+    paths, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker) as executor:
+        futures = {}
+        for group_by in group_bys:
+            data = aggregates[group_by] if aggregates is not None else df
+            data = _sum_by(data, group_by, indicator)
+            futures[group_by] = executor.submit(_render_report, project_address, data, date, group_by)
 
-    if "Código Transportista" in document["group_by"]:
-        report_transportista(project_address, df, date, "Código Transportista")
+        for group_by, future in futures.items():
+            try:
+                paths[group_by] = future.result()
+            except Exception as e:
+                errors[group_by] = f"{type(e).__name__}: {e}"
 
-    if "Ruta Troncal Dinámico" in document["group_by"]:
-        report_ruta(project_address, df, date, "Ruta Troncal Dinámico")
+    for group_by, error in errors.items():
+        print(f"❌ {group_by}: {error}")
 
-    if "Cliente" in document["group_by"]:
-        report_cliente(project_address, df, date, "Cliente")
\ No newline at end of file
+    return paths, errors
@@ -0,0 +1,210 @@
+# COLA DE ENVÍOS A WHATSAPP (persistente, asyncio)
+
+import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import send_reports_through_wssp as srtw
+import metrics_management as metrics
+
+# ==========================
+# COLA PERSISTENTE
+# ==========================
+# Cada par (grupo, gráfico) -o (grupo, álbum)- es un job con estado guardado en
+# un JSON junto a los gráficos. El id del job sale del grupo y del contenido de
+# los archivos: un reinicio no vuelve a enviar lo que ya figura como enviado.
+# Al encolar se copian los archivos a una carpeta del job (cola/<id>/): un
+# nuevo render que sobrescriba los gráficos no cambia lo que envía un job ya
+# encolado (p. ej. uno interrumpido en 'enviando').
+
+PENDING = 'pendiente'
+SENDING = 'enviando'
+SENT = 'enviado'
+FAILED = 'fallido'
+
+QUEUE = {
+    "max_contexts": 2,      # navegadores en paralelo (uno por grupo)
+    "max_attempts": 3,      # intentos por job antes de marcarlo fallido
+    "backoff": 5.0,         # segundos antes del 1er reintento (se duplica)
+}
+
+def get_queue_address(project_address):
+    return os.path.join(project_address, 'cola_envios.json')
+
+# Carpeta con las copias de los archivos de cada job
+def get_jobs_address(queue_address):
+    return os.path.join(os.path.dirname(queue_address), 'cola')
+
+def load_queue(queue_address):
+    try:
+        with open(queue_address, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_queue(queue_address, jobs):
+    tmp_address = queue_address + '.tmp'
+    with open(tmp_address, 'w', encoding='utf-8') as f:
+        json.dump(jobs, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_address, queue_address)
+
+# Id del job: grupo + contenido de los archivos (no su ruta ni su fecha)
+def job_id(group_name, paths):
+    digest = hashlib.sha1(group_name.encode('utf-8'))
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha1(f.read()).digest())
+    return digest.hexdigest()
+
+def _set_status(job, status, error=None):
+    job['status'] = status
+    job['error'] = error
+    job['updated'] = time.time()
+
+# Encolar los gráficos de project_address para cada grupo
+# album=True: un job por grupo con todos los gráficos
+def enqueue(queue_address, project_address, group_names, album=False):
+    graphics = srtw.get_attatchments(project_address)
+    if not graphics:
+        return 0
+
+    batches = [list(graphics)] if album else [[name] for name in graphics]
+    jobs = load_queue(queue_address)
+
+    added = 0
+    for group_name in group_names:
+        for names in batches:
+            files = {name: graphics[name] for name in names}
+            key = job_id(group_name, files.values())
+
+            # Mismo contenido ya encolado o enviado -> no duplicar
+            if key in jobs and jobs[key]['status'] != FAILED:
+                continue
+
+            # Copia del contenido encolado (el job no depende de los originales)
+            job_address = os.path.join(get_jobs_address(queue_address), key)
+            shutil.rmtree(job_address, ignore_errors=True)
+            os.makedirs(job_address)
+            files = {name: shutil.copy2(path, os.path.join(job_address, name)) for name, path in files.items()}
+
+            jobs[key] = {
+                'id': key,
+                'group': group_name,
+                'files': files,
+                'album': album,
+                'attempts': 0,
+            }
+            _set_status(jobs[key], PENDING)
+            added += 1
+
+    save_queue(queue_address, jobs)
+    return added
+
+# Conteo de jobs por estado
+def queue_summary(jobs):
+    summary = {}
+    for job in jobs.values():
+        summary[job['status']] = summary.get(job['status'], 0) + 1
+    return summary
+
+# ==========================
+# ENVÍO CONCURRENTE
+# ==========================
+# Un navegador por grupo, hasta QUEUE['max_contexts'] a la vez. Chrome no
+# permite abrir el mismo perfil dos veces: el contexto i usa '<perfil>-i'
+# (cada perfil adicional debe tener la sesión de WhatsApp iniciada una vez).
+# Selenium es bloqueante: cada paso corre en un hilo con asyncio.to_thread.
+
+def get_profile_dir(profile_dir, slot):
+    return profile_dir if slot == 0 else f"{profile_dir}-{slot}"
+
+async def _send_group(group_name, group_jobs, jobs, queue_address, options, page_url, settings):
+    session = srtw.WhatsAppSession(options, page_url)
+    chat_open = False
+    try:
+        for job in group_jobs:
+            while job['status'] == PENDING:
+                _set_status(job, SENDING)
+                save_queue(queue_address, jobs)
+                try:
+                    if not session.is_alive():
+                        await asyncio.to_thread(session.start)
+                        chat_open = False
+                    if not chat_open:
+                        await asyncio.to_thread(session.open_chat, group_name)
+                        chat_open = True
+
+                    send = session.send_album if job['album'] else session.send_graphics
+                    await asyncio.to_thread(send, job['files'])
+                except Exception as e:
+                    job['attempts'] += 1
+                    error = f"{type(e).__name__}: {e}".strip()
+                    retry = job['attempts'] < settings['max_attempts']
+                    _set_status(job, PENDING if retry else FAILED, error)
+                    save_queue(queue_address, jobs)
+                    print(f"❌ {group_name} / {', '.join(job['files'])} (intento {job['attempts']}): {error}")
+
+                    # Reabrir el chat antes de reintentar (estado del DOM desconocido)
+                    chat_open = False
+                    if retry:
+                        await asyncio.sleep(settings['backoff'] * 2 ** (job['attempts'] - 1))
+                else:
+                    _set_status(job, SENT)
+                    save_queue(queue_address, jobs)
+                    print(f"[✓] {group_name} / {', '.join(job['files'])}")
+
+                    # Enviado: las copias ya no hacen falta (el id queda en la cola)
+                    shutil.rmtree(os.path.join(get_jobs_address(queue_address), job['id']), ignore_errors=True)
+    finally:
+        await asyncio.to_thread(session.close)
+
+# Enviar los jobs pendientes de la cola; devuelve el conteo por estado
+async def run_queue(queue_address, page_url, profile_dir=srtw.PROFILE_DIR, **settings):
+    settings = dict(QUEUE, **settings)
+    jobs = load_queue(queue_address)
+
+    # Jobs interrumpidos a mitad de envío (reinicio) -> se reintentan
+    for job in jobs.values():
+        if job['status'] == SENDING:
+            _set_status(job, PENDING, job.get('error'))
+
+    by_group = {}
+    for job in jobs.values():
+        if job['status'] == PENDING:
+            by_group.setdefault(job['group'], []).append(job)
+
+    if not by_group:
+        print('[*] Cola de envíos sin pendientes.')
+        return queue_summary(jobs)
+
+    # Cada contexto (perfil de Chrome) lo usa un solo grupo a la vez
+    slots = asyncio.Queue()
+    for slot in range(min(settings['max_contexts'], len(by_group))):
+        slots.put_nowait(slot)
+
+    async def worker(group_name, group_jobs):
+        slot = await slots.get()
+        try:
+            options = srtw.build_options(get_profile_dir(profile_dir, slot))
+            await _send_group(group_name, group_jobs, jobs, queue_address, options, page_url, settings)
+        finally:
+            slots.put_nowait(slot)
+
+    await asyncio.gather(*(worker(g, group_jobs) for g, group_jobs in by_group.items()))
+
+    summary = queue_summary(jobs)
+    print(f"[*] Cola de envíos: {summary}")
+    return summary
+
+# Punto de entrada síncrono (CLI). En un notebook usar 'await run_queue(...)'
+@metrics.instrument("send_queue")
+def process_queue(queue_address, page_url, profile_dir=srtw.PROFILE_DIR, **settings):
+    return asyncio.run(run_queue(queue_address, page_url, profile_dir, **settings))
+
+# Encolar y enviar los gráficos de project_address (equivalente a srtw.main)
+def main(project_address, WSSP_CONFIF, album=False, **settings):
+    queue_address = get_queue_address(project_address)
+    enqueue(queue_address, project_address, WSSP_CONFIF['group_names'], album=album)
+    return process_queue(queue_address, WSSP_CONFIF['page_url'], **settings)
@@ -1,105 +1,285 @@
 import os
 import time
 from pathlib import Path
+from contextlib import contextmanager
 from selenium.webdriver.chrome.options import Options
 from selenium import webdriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import WebDriverException
+import metrics_management as metrics
+
+# Archivos a enviar (originales PNG, variantes optimizadas o reporte PDF)
+IMAGE_PATTERNS = ('*.png', '*.jpg', '*.jpeg', '*.webp', '*.pdf')
 
 def get_attatchments(project_address):
     attachment_folder = Path(project_address)
     graphics_address = {}
 
-    for attch in attachment_folder.glob('*.png'):
-        graphics_address[attch.name] = os.path.join(project_address, attch.name)
+    for pattern in IMAGE_PATTERNS:
+        for attch in sorted(attachment_folder.glob(pattern)):
+            graphics_address[attch.name] = os.path.join(project_address, attch.name)
 
     return graphics_address
 
-def send_mssg_to_chat(options, page_url, group_name, graphics):
+# ==========================
+# SESIÓN DE WHATSAPP WEB
+# ==========================
+# Un solo navegador para todos los grupos: se abre y carga WhatsApp Web una
+# vez y luego solo se cambia de chat. Puede quedar abierto entre ejecuciones
+# (ver get_session).
 
-    print('\n.-----------------------------------------------------------------------.')
+SEARCH_BOX = "//div[@contenteditable='true'][@data-tab='3']"
+ATTACH_BUTTON = "//div[@role='button' and @aria-label='Adjuntar']"
+IMAGE_INPUT = "//input[@accept='image/*,video/mp4,video/3gpp,video/quicktime']"
+DOCUMENT_INPUT = "//input[@accept='*']"
+# Editor de medios: la capa con su propio botón "Enviar" que se abre al
+# adjuntar, fuera de la conversación (#main). Las imágenes ya enviadas (blob:)
+# y el cuadro de mensaje del chat viven en #main: no cumplen las esperas
+# antes de que el editor abra.
+MEDIA_EDITOR = (
+    "//div[not(@id='main') and not(ancestor::div[@id='main']) and not(.//div[@id='main'])]"
+    "[.//div[@role='button' and @aria-label='Enviar']]"
+)
+MEDIA_PREVIEW = MEDIA_EDITOR + "//img[starts-with(@src, 'blob:')]"
+# Miniaturas de la barra inferior del editor de medios (modo álbum)
+MEDIA_THUMBNAIL = MEDIA_EDITOR + "//div[@role='listitem' and .//img[starts-with(@src, 'blob:')]]"
+CAPTION_BOX = MEDIA_EDITOR + "//div[@contenteditable='true']"
+SEND_BUTTON = MEDIA_EDITOR + "//div[@role='button' and @aria-label='Enviar']"
+MESSAGE_OUT = "//div[contains(@class, 'message-out')]"
+# Último mensaje propio con check de enviado / entregado / leído
+MESSAGE_SENT = (
+    "(" + MESSAGE_OUT + ")[last()]//span[@data-icon='msg-check' "
+    "or @data-icon='msg-dblcheck' or @data-icon='msg-dblcheck-ack']"
+)
 
-    try:
-        driver = webdriver.Chrome(options=options)        
-        print(f'[*] Abriendo Grupo de WSSP ({group_name})')
+class WhatsAppSession:
+    def __init__(self, options, page_url):
+        self.options = options
+        self.page_url = page_url
+        self.driver = None
+        self.timings = []       # [(paso, segundos)]
+
+    @metrics.instrument("wssp.start")
+    def start(self):
+        self.driver = webdriver.Chrome(options=self.options)
+        print('[*] Abriendo WhatsApp Web')
 
-        driver.get(page_url)
+        self.driver.get(self.page_url)
         print("[*] Esperando que WhatsApp Web cargue completamente...")
 
         # ✅ Esperar a que aparezca el buscador (indicador de carga completa)
-        WebDriverWait(driver, 40).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
+        WebDriverWait(self.driver, 40).until(
+            EC.presence_of_element_located((By.XPATH, SEARCH_BOX))
         )
         print("[✓] WhatsApp Web cargado.")
+        return self
 
-        # Buscar grupo
-        search_box = driver.find_element(By.XPATH, "//div[@contenteditable='true'][@data-tab='3']")
-        search_box.click()
-        time.sleep(1)
-        search_box.send_keys(group_name)
-        time.sleep(3)
+    def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
 
-        # Esperar y hacer clic en el grupo
-        clip_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, f"//span[@title='{group_name}']"))
-        )
-        clip_button.click()
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+
+    # Medir la duración de cada paso del envío
+    @contextmanager
+    def timed(self, step):
+        started = time.perf_counter()
+        try:
+            with metrics.record(f"wssp.{step}"):
+                yield
+        finally:
+            self.timings.append((step, time.perf_counter() - started))
+
+    def print_timings(self):
+        totals = {}
+        for step, seconds in self.timings:
+            count, total = totals.get(step, (0, 0.0))
+            totals[step] = (count + 1, total + seconds)
+
+        print('[*] Tiempos de envío:')
+        for step, (count, total) in totals.items():
+            print(f'    {step:<12} {count:>3}x  {total:7.2f} s  (prom. {total / count:.2f} s)')
+
+    def __enter__(self):
+        if not self.is_alive():
+            self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Cambiar al chat del grupo (sin recargar la página)
+    def open_chat(self, group_name):
+        wait = WebDriverWait(self.driver, 20)
+
+        with self.timed('buscar'):
+            search_box = wait.until(EC.element_to_be_clickable((By.XPATH, SEARCH_BOX)))
+            search_box.click()
+            search_box.send_keys(Keys.CONTROL + 'a', Keys.BACKSPACE)
+            search_box.send_keys(group_name)
+
+            # Esperar y hacer clic en el grupo
+            group = wait.until(
+                EC.element_to_be_clickable((By.XPATH, f"//span[@title='{group_name}']"))
+            )
+
+        with self.timed('abrir_chat'):
+            group.click()
+            # Chat abierto: el encabezado muestra el grupo y el clip está disponible
+            wait.until(EC.presence_of_element_located((By.XPATH, f"//header//span[@title='{group_name}']")))
+            wait.until(EC.element_to_be_clickable((By.XPATH, ATTACH_BUTTON)))
         print(f"\n[✓] Click realizado en el grupo: '{group_name}'")
-        time.sleep(3)
+
+    def send_graphics(self, graphics):
+        driver = self.driver
+        wait = WebDriverWait(driver, 30)
 
         for graph_name, graph_address in graphics.items():
-            # Esperar hasta que el ícono del clip esté presente y visible
-            attach_button = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and @aria-label='Adjuntar']"))
-            )
-            # attach_button = WebDriverWait(driver, 10).until(
-            #     EC.element_to_be_clickable((By.XPATH, "//button[@title='Adjuntar' and @type='button']"))
-            # )
+            with self.timed('adjuntar'):
+                # Esperar hasta que el ícono del clip esté presente y visible
+                attach_button = wait.until(EC.element_to_be_clickable((By.XPATH, ATTACH_BUTTON)))
+                attach_button.click()
+                print(f"\n[✓] Click realizado en el botón de 'Adjuntar'")
+
+                # Esperar el input para cargar imagen (o documento PDF)
+                is_document = graph_address.lower().endswith('.pdf')
+                file_input = wait.until(EC.presence_of_element_located(
+                    (By.XPATH, DOCUMENT_INPUT if is_document else IMAGE_INPUT)
+                ))
+
+            with self.timed('cargar'):
+                print(f'[*] Cargando archivo ({graph_name}) ...')
+                file_input.send_keys(graph_address)
+
+                # Vista previa renderizada y botón de enviar habilitado
+                if not is_document:
+                    wait.until(EC.visibility_of_element_located((By.XPATH, MEDIA_PREVIEW)))
+                send_button = wait.until(EC.element_to_be_clickable((By.XPATH, SEND_BUTTON)))
+
+            with self.timed('comentario'):
+                # Escribir texto junto a la imagen
+                caption_box = wait.until(EC.element_to_be_clickable((By.XPATH, CAPTION_BOX)))
+                print(f'[*] Escribiendo mensaje ...')
+                caption_box.send_keys(graph_name.split('_')[1])
+
+            with self.timed('enviar'):
+                sent_before = len(driver.find_elements(By.XPATH, MESSAGE_OUT))
+                send_button.click()
+
+                # Nueva burbuja propia con check de enviado
+                wait.until(lambda d: len(d.find_elements(By.XPATH, MESSAGE_OUT)) > sent_before)
+                wait.until(EC.presence_of_element_located((By.XPATH, MESSAGE_SENT)))
+
+    # Modo álbum: todas las imágenes en un solo adjuntar/enviar,
+    # con el comentario de cada imagen escrito sobre su miniatura
+    def send_album(self, graphics):
+        driver = self.driver
+        wait = WebDriverWait(driver, 60)
+        names = list(graphics)
+
+        with self.timed('adjuntar'):
+            attach_button = wait.until(EC.element_to_be_clickable((By.XPATH, ATTACH_BUTTON)))
             attach_button.click()
-            print(f"\n[✓] Click realizado en el botón de 'Adjuntar'")
-            time.sleep(2)
+            image_input = wait.until(EC.presence_of_element_located((By.XPATH, IMAGE_INPUT)))
 
-            # Esperar el input para cargar imagen
-            image_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//input[@accept='image/*,video/mp4,video/3gpp,video/quicktime']"))
-            )
-            print(f'[*] Cargando imagen ({graph_name}) ...')
-            image_input.send_keys(graph_address)
-            time.sleep(3)
-
-            # Esperar y escribir texto junto a la imagen
-            # caption_box = WebDriverWait(driver, 10).until(
-            #     EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true' and @aria-label='Añade un comentario']"))
-            # )
-            caption_box = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true' and @aria-label='Escribe un mensaje']"))
-            )
-            print(f'[*] Escribiendo mensaje ...')
-            time.sleep(1)
-            caption_box.send_keys(graph_name.split('_')[1])
+        with self.timed('cargar'):
+            print(f'[*] Cargando álbum ({len(names)} imágenes) ...')
+            # El input acepta varios archivos separados por salto de línea
+            image_input.send_keys('\n'.join(graphics[name] for name in names))
 
-            # Enviar
-            send_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and @aria-label='Enviar']"))
-            )
+            wait.until(lambda d: len(d.find_elements(By.XPATH, MEDIA_THUMBNAIL)) >= len(names))
+            send_button = wait.until(EC.element_to_be_clickable((By.XPATH, SEND_BUTTON)))
+
+        with self.timed('comentario'):
+            thumbnails = driver.find_elements(By.XPATH, MEDIA_THUMBNAIL)
+            for name, thumbnail in zip(names, thumbnails):
+                thumbnail.click()
+                caption_box = wait.until(EC.element_to_be_clickable((By.XPATH, CAPTION_BOX)))
+                caption_box.send_keys(name.split('_')[1])
+
+        with self.timed('enviar'):
+            sent_before = len(driver.find_elements(By.XPATH, MESSAGE_OUT))
             send_button.click()
-            time.sleep(3)
 
-    finally:
+            wait.until(lambda d: len(d.find_elements(By.XPATH, MESSAGE_OUT)) > sent_before)
+            wait.until(EC.presence_of_element_located((By.XPATH, MESSAGE_SENT)))
+
+    @metrics.instrument("wssp.send_to_group")
+    def send_to_group(self, group_name, graphics, album=False):
+        print('\n.-----------------------------------------------------------------------.')
+        print(f'[*] Abriendo Grupo de WSSP ({group_name})')
+
+        self.timings = []
+        self.open_chat(group_name)
+        if album:
+            self.send_album(graphics)
+        else:
+            self.send_graphics(graphics)
+
         print(f'\n✅ Reportes enviados correctamente')
-        driver.quit()
+        self.print_timings()
+        print("'-----------------------------------------------------------------------'\n")
 
-    print("'-----------------------------------------------------------------------'\n")
+# Sesión reutilizable entre ejecuciones (notebook abierto o proceso de servicio)
+# Sobrevive a importlib.reload() del módulo
+_SESSION = globals().get('_SESSION')
 
-# Captura de gráficos de Power BI por página
-def main(project_address, WSSP_CONFIF):
+def get_session(options, page_url):
+    global _SESSION
+    if _SESSION is None or not _SESSION.is_alive():
+        _SESSION = WhatsAppSession(options, page_url).start()
+    return _SESSION
+
+def close_session():
+    global _SESSION
+    if _SESSION is not None:
+        _SESSION.close()
+        _SESSION = None
+
+def send_mssg_to_chat(options, page_url, group_name, graphics):
+    with WhatsAppSession(options, page_url) as session:
+        session.send_to_group(group_name, graphics)
+
+# Perfil de Chrome con la sesión de WhatsApp Web iniciada
+PROFILE_DIR = "C:\\Users\\AYACDA23\\AppData\\Local\\Google\\Chrome\\User Data\\Profile 6"
+
+def build_options(profile_dir=PROFILE_DIR):
     options = Options()
     options.add_argument("--start-maximized")
-    options.add_argument("--user-data-dir=C:\\Users\\AYACDA23\\AppData\\Local\\Google\\Chrome\\User Data\\Profile 6")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    return options
+
+# Captura de gráficos de Power BI por página
+# keep_alive=True deja el navegador abierto para la siguiente ejecución
+# album=True envía todos los gráficos en un solo mensaje
+# Devuelve False si no había archivos para enviar
+def main(project_address, WSSP_CONFIF, keep_alive=False, album=False):
+    options = build_options()
 
     graphics = get_attatchments(project_address)
+    if not graphics:
+        print(f"❌ No hay archivos para enviar en {project_address}")
+        return False
 
     page_url = WSSP_CONFIF['page_url']
-    for group_name in WSSP_CONFIF['group_names']:
-        send_mssg_to_chat(options, page_url, group_name, graphics)
\ No newline at end of file
+    session = get_session(options, page_url)
+    try:
+        for group_name in WSSP_CONFIF['group_names']:
+            session.send_to_group(group_name, graphics, album=album)
+    finally:
+        if not keep_alive:
+            close_session()
+    return True
\ No newline at end of file
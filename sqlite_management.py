@@ -0,0 +1,182 @@
+# ALMACÉN LOCAL EN SQLITE (backend opcional)
+
+import os
+import json
+import sqlite3
+from contextlib import closing
+import pandas as pd
+import files_management as fm
+import metrics_management as metrics
+
+TABLE = "rechazos"
+INDICATOR = "Venta Perdida CF"
+
+# ==========================
+# ALMACÉN
+# ==========================
+# Las filas ya procesadas (como file_processing) se guardan en un archivo SQLite
+# junto al CSV (<csv>.sqlite), con índices sobre la fecha y la locación.
+# Los filtros de periodo/locación y las sumas por dimensión se resuelven
+# con SQL: solo vuelven a pandas las filas o las sumas pedidas.
+
+def get_db_address(file, root_address):
+    return os.path.splitext(os.path.join(root_address, file['file_name']))[0] + '.sqlite'
+
+# Nombre de columna entre comillas (tienen espacios y tildes)
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+# Fechas guardadas como texto ISO (yyyy-mm-dd): el orden de texto es el de fecha
+def _sql_date(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+def _read_db_meta(db_address):
+    if not os.path.exists(db_address):
+        return None
+    try:
+        with closing(sqlite3.connect(db_address)) as con:
+            row = con.execute("SELECT value FROM _meta WHERE key = 'source'").fetchone()
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, ValueError):
+        return None
+
+# Fechas como texto ISO antes de escribir en SQLite
+def _prepare_rows(df, file):
+    df = df.reset_index(drop=True)
+    df[file['date']] = df[file['date']].dt.strftime('%Y-%m-%d')
+    return df
+
+def _write_meta(con, meta):
+    con.execute("INSERT OR REPLACE INTO _meta VALUES ('source', ?)", (json.dumps(meta or {}, ensure_ascii=False),))
+
+# Escribir el almacén completo (archivo temporal + reemplazo atómico)
+def write_db(df, file, db_address, meta=None):
+    date = file['date']
+    df = _prepare_rows(df, file)
+
+    tmp_address = db_address + '.tmp'
+    if os.path.exists(tmp_address):
+        os.remove(tmp_address)
+
+    con = sqlite3.connect(tmp_address)
+    try:
+        df.to_sql(TABLE, con, index=False, chunksize=50_000)
+        con.execute(f"CREATE INDEX idx_dia_locacion ON {TABLE} ({_quote(date)}, {_quote('Locación')})")
+        con.execute(f"CREATE INDEX idx_locacion_dia ON {TABLE} ({_quote('Locación')}, {_quote(date)})")
+        con.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+        _write_meta(con, meta)
+        con.commit()
+    finally:
+        con.close()
+
+    os.replace(tmp_address, db_address)
+    return db_address
+
+# Agregar filas al almacén existente (una sola transacción con su _meta)
+def append_db(df, file, db_address, meta):
+    with closing(sqlite3.connect(db_address)) as con:
+        with con:
+            if not df.empty:
+                _prepare_rows(df, file).to_sql(TABLE, con, index=False, if_exists='append', chunksize=50_000)
+            _write_meta(con, meta)
+    return db_address
+
+# Crear/actualizar el almacén desde el CSV de root_address
+# Usa el store incremental (files_management.update_store): si el CSV solo
+# creció se insertan únicamente las filas ingeridas al store después del
+# offset que tiene el almacén (aunque otro proceso haya avanzado el store);
+# se reconstruye si el CSV fue reescrito o cambian columnas, esquema o locaciones
+@metrics.instrument("sync_db")
+def sync_db(file, locaciones, root_address):
+    db_address = get_db_address(file, root_address)
+
+    rows, appended = fm.update_store(file, root_address, locaciones)
+    state = fm.read_store_state(file, root_address)
+
+    meta = _read_db_meta(db_address)
+    same_layout = (
+        meta is not None
+        and meta.get('columns') == file['relevant_columns']
+        and meta.get('schema') == fm.get_schema(file)
+        and meta.get('locaciones') == list(locaciones)
+    )
+    source = {
+        'offset': state['offset'],
+        'fingerprint': state['fingerprint'],
+        'columns': file['relevant_columns'],
+        'schema': fm.get_schema(file),
+        'locaciones': list(locaciones),
+    }
+
+    if same_layout:
+        if meta.get('offset') == state['offset'] and meta.get('fingerprint') == state['fingerprint']:
+            return db_address
+
+        rows_since = fm.load_store_since(file, root_address, meta.get('offset'), meta.get('fingerprint'))
+        if rows_since is not None:
+            rows_since = fm.adjust_values(fm.get_relevant_locations(rows_since, locaciones))
+            print(f"[*] Almacén SQLite: {len(rows_since)} filas nuevas")
+            return append_db(rows_since, file, db_address, source)
+
+    print(f"[*] Actualizando almacén SQLite: {os.path.basename(db_address)}")
+    df = rows if not appended else fm.load_store(file, root_address)
+    df = fm.adjust_values(fm.get_relevant_locations(df, locaciones))
+
+    return write_db(df, file, db_address, source)
+
+# ==========================
+# CONSULTAS
+# ==========================
+
+# Cláusula WHERE para un rango de fechas (inclusivo) y locaciones
+def _where(file, started_date=None, ended_date=None, locations=None):
+    clauses, params = [], []
+    if started_date is not None:
+        clauses.append(f"{_quote(file['date'])} >= ?")
+        params.append(_sql_date(started_date))
+    if ended_date is not None:
+        clauses.append(f"{_quote(file['date'])} <= ?")
+        params.append(_sql_date(ended_date))
+    if locations is not None:
+        clauses.append(f"{_quote('Locación')} IN ({', '.join('?' * len(locations))})")
+        params.extend(locations)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+# Filas de un periodo/locaciones (equivale a get_specific_date + get_specific_location)
+@metrics.instrument("query_rows")
+def query_rows(db_address, file, started_date=None, ended_date=None, locations=None):
+    where, params = _where(file, started_date, ended_date, locations)
+    sql = f"SELECT * FROM {TABLE}{where} ORDER BY {_quote(file['date'])}"
+
+    with closing(sqlite3.connect(db_address)) as con:
+        df = pd.read_sql_query(sql, con, params=params)
+
+    df = fm.set_column_types(df, file)
+    return fm.index_by_date(df, file)
+
+# Suma del indicador por una dimensión (misma Serie que ruta_panel._sum_by)
+def query_aggregate(db_address, file, group_by, started_date=None, ended_date=None, locations=None, con=None):
+    where, params = _where(file, started_date, ended_date, locations)
+    where += (' AND ' if where else ' WHERE ') + f"{_quote(group_by)} IS NOT NULL"
+    sql = (
+        f"SELECT {_quote(group_by)}, SUM({_quote(INDICATOR)}) FROM {TABLE}{where} "
+        f"GROUP BY {_quote(group_by)} ORDER BY 2 DESC"
+    )
+
+    if con is None:
+        with closing(sqlite3.connect(db_address)) as con:
+            rows = con.execute(sql, params).fetchall()
+    else:
+        rows = con.execute(sql, params).fetchall()
+
+    index = pd.Index([row[0] for row in rows], name=group_by)
+    return pd.Series([row[1] for row in rows], index=index, name=INDICATOR, dtype='float64')
+
+# Series agregadas para todas las dimensiones (entrada 'aggregates' de ruta_panel)
+@metrics.instrument("query_all")
+def query_all(db_address, file, started_date=None, ended_date=None, locations=None):
+    with closing(sqlite3.connect(db_address)) as con:
+        return {
+            group_by: query_aggregate(db_address, file, group_by, started_date, ended_date, locations, con=con)
+            for group_by in file['group_by']
+        }
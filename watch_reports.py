@@ -0,0 +1,144 @@
+# MODO VIGILANCIA (proceso que queda abierto)
+#
+#   python watch_reports.py --send oficial --keep-alive
+#   python watch_reports.py --period 2:10/2025 --location 2 --debounce 10
+#
+# Espera a que el CSV exportado aparezca o cambie en --root, y cuando deja de
+# crecer durante --debounce segundos ejecuta carga -> filtro -> reportes -> envío.
+# Los datos procesados, las librerías y (con --keep-alive) WhatsApp Web quedan
+# en memoria entre disparos: solo se leen las filas nuevas del CSV.
+# Sin --period se reporta el último día con datos.
+
+import os
+import sys
+import time
+import argparse
+
+import config
+import cli
+
+# Firma del archivo (None si no existe)
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+# Bloquea hasta que el archivo cambie respecto a 'last_signature' y luego se
+# mantenga igual durante 'debounce' segundos (exportación terminada)
+def wait_for_export(path, last_signature, interval=1.0, debounce=5.0):
+    candidate, stable_since = None, None
+    while True:
+        signature = file_signature(path)
+        if signature is not None and signature != last_signature:
+            if signature != candidate:
+                candidate, stable_since = signature, time.monotonic()
+            elif time.monotonic() - stable_since >= debounce:
+                return signature
+        else:
+            candidate = None
+        time.sleep(interval)
+
+# Importar una vez los módulos pesados (sin arranque en frío en cada disparo)
+def warm_up(args):
+    import matplotlib
+    matplotlib.use('Agg')
+    import pandas
+    import files_management
+    import ruta_panel
+    if args.send:
+        import send_reports_through_wssp
+
+# Periodo por defecto: el último día con datos
+def latest_day_period(df, document):
+    day = df[document['date']].max()
+    return 3, f"{day.year}-{day.month}-{day.day}"
+
+# Un ciclo del pipeline sobre los datos en memoria; devuelve el df actualizado
+def run_once(args, document, df):
+    import files_management as fm
+    import metrics_management as metrics
+
+    metrics.reset_run()
+    try:
+        started = time.perf_counter()
+
+        df = fm.refresh_processing(df, document, config.locaciones, args.root)
+        df = fm.index_by_date(df, document)
+        print(f"[✓] Datos en memoria: {len(df)} filas ({time.perf_counter() - started:.1f} s)")
+
+        run_args = argparse.Namespace(**vars(args))
+        if run_args.period is None:
+            run_args.period = latest_day_period(df, document)
+
+        run_document = document
+        if run_args.alerts:
+            group_by = cli.alert_stage(run_args, document)
+            if not group_by:
+                return df
+            run_document = dict(document, group_by=group_by)
+
+        data = cli.filter_stage(run_args, run_document, df)
+        if data.empty:
+            print("[!] Sin datos para el periodo/locación seleccionados.")
+            return df
+
+        cli.render_stage(run_args, run_document, data)
+        print(f"[✓] Gráficos generados en {args.output} ({time.perf_counter() - started:.1f} s)")
+
+        if run_args.send:
+            cli.send_stage(run_args)
+            print(f"[✓] Envío terminado ({time.perf_counter() - started:.1f} s)")
+        return df
+    finally:
+        metrics.run_report(cli.trace_path(args))
+
+def main(argv=None):
+    parser = cli.build_parser("Regenerar y enviar reportes cuando llega un nuevo CSV.", period_required=False)
+    parser.add_argument('--interval', type=float, default=1.0, help="Segundos entre revisiones del archivo")
+    parser.add_argument('--debounce', type=float, default=5.0,
+                        help="Segundos sin cambios antes de procesar (exportación terminada)")
+    parser.add_argument('--run-now', action='store_true', help="Procesar también el CSV actual al iniciar")
+    args = parser.parse_args(argv)
+
+    if args.backend == 'sqlite' or args.stream:
+        parser.error("El modo vigilancia trabaja en memoria (usar --backend csv sin --stream).")
+    cli.check_period(parser, args)
+
+    import files_management as fm
+    document = dict(config.ruta, group_by=args.groups)
+    csv_path = os.path.join(args.root, document['file_name'])
+
+    print("[*] Preparando librerías y datos ...")
+    warm_up(args)
+
+    # Datos en memoria desde el inicio; solo se reporta lo que llegue después
+    signature = file_signature(csv_path)
+    df = None
+    if signature is not None:
+        df = fm.index_by_date(fm.refresh_processing(None, document, config.locaciones, args.root), document)
+        if args.run_now:
+            signature = None
+
+    print(f"[*] Vigilando {csv_path} (Ctrl+C para terminar)")
+    try:
+        while True:
+            signature = wait_for_export(csv_path, signature, args.interval, args.debounce)
+            print(f"\n[*] Nuevo archivo detectado: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            try:
+                df = run_once(args, document, df)
+            except Exception as e:
+                # Un ciclo fallido no detiene la vigilancia
+                print(f"❌ Error en el ciclo: {type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        print("\n[*] Vigilancia detenida.")
+    finally:
+        if args.send and args.keep_alive:
+            import send_reports_through_wssp as srtw
+            srtw.close_session()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())